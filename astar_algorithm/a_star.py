@@ -1,304 +1,2008 @@
-from glob import glob
-from sys import version_info as version
-if version[0] == 3:
-    # for Python3
-    from tkinter import *   # notice lowercase 't' in tkinter here
-else:
-    # for Python2
-    from Tkinter import *   # notice capitalized T in Tkinter
-
-
-
-class Node:
-    """
-    Node object to obtain the various states and attributes of a node
-    """
-    def __init__(self, x_pos, y_pos, wall, cost, char):
-        self.x = x_pos              # X-position in board
-        self.y = y_pos              # Y-position in board
-        self.g = float('inf')       # cost of getting to this node
-        self.h = None               # estimated cost to goal
-        self.is_wall = wall         # if True, then it is a wall
-        self.parent = None          # pointer to best parent node
-        self.cost = cost            # arc_cost?
-        self.children = []          # list of all successor nodes
-        self.is_goal = False        # Set to True if the node is the goal
-        self.char = char
-
-    def f(self):
-        return self.g + self.h      # estimated total cost of a solution path
-
-    def __repr__(self):
-        return "[" + str(self.x) + "," + str(self.y) + "]"
-
-    def __str__(self):
-        return "[" + str(self.x) + "," + str(self.y) + "]"
-
-
-class Board:
-    """
-    Create a Board-object to hold the state of the board
-    """
-    def __init__(self, nodes, start, goal, board_path):
-        self.nodes = nodes
-        self.start = start  
-        self.goal = goal
-
-        self.open_nodes = [start]
-        self.closed_nodes = []
-
-        self.name = board_path.strip(".txt")
-
-    def __str__(self):
-        return str(self.name.strip("/boards"))
-
-
-def make_board(board_path):
-    """
-    Create a board based on reading lines from a .txt-file
-    :param board_path: file.txt
-    :return: Board
-    """
-    costs = {'w':100, 'm': 50, 'f': 10, 'g': 5, 'r': 1, '.': 1}
-    nodes = []
-    start, goal = None, None
-    file = open(board_path, "r")
-    lines = [line.strip('\n') for line in file]
-    for i in range(len(lines)):
-        row = []
-        for j in range(len(lines[i])):
-            letter = lines[i][j]
-            if letter in costs.keys():
-                cost = costs[letter]
-                node = Node(i, j, False, cost, letter)
-                row.append(node)
-            elif lines[i][j] == "A":
-                start = Node(i, j, False, 1, "A")
-                #print("-----\tSTART IS SET-----\n", start)
-                row.append(start)
-            elif lines[i][j] == "B":
-                goal = Node(i, j, False, 1, "B")
-                goal.is_goal = True
-                #print("-----\tGOAL IS SET-----\n", goal)
-                row.append(goal)
-            elif lines[i][j] == '#':
-                wall_node = Node(i, j, True, float('inf'), "#")
-                row.append(wall_node)
-        nodes.append(row)
-    goal.h = 0
-    start.h = abs(goal.x - start.x) + abs(goal.y - start.y)
-    start.g = 0
-    return Board(nodes, start, goal, board_path), nodes 
-
-
-def a_star(board):
-    """
-    Basically pseudocode to python implementation of A* algorithm
-    (Humble version: my first time implementing A*)
-    :param board: Board
-    :return: Null
-    """
-    while True:
-        #if not board.open_nodes:
-         #   return False
-        cur_node = board.open_nodes.pop(0)      # init node
-        board.closed_nodes.append(cur_node)     # place it in CLOSED
-
-        if cur_node.is_goal:
-            print("A* success!!")
-            return make_path(cur_node, board, board.start, board.goal), board.nodes
-
-        generate_all_successors(cur_node, board.nodes)
-        for child in cur_node.children:
-            if child not in board.closed_nodes and child not in board.open_nodes:
-                attach_and_eval(child, cur_node, board)
-                board.open_nodes.append(child)
-                board.open_nodes.sort(key=lambda x: x.f())  
-            elif cur_node.g + child.cost < child.g:
-                attach_and_eval(child, cur_node, board)
-                if child in board.closed_nodes:
-                    propogate_path_improvements(child)
-
-
-
-def make_path(cur_node, board, start, goal):
-    """
-    Iteratively track down the fastest path
-    :param cur_node:
-    :param board:
-    :param start:
-    :param goal:
-    :return:
-    """
-    path = []
-    while cur_node != board.start:
-        path.append([cur_node.x, cur_node.y])
-        if cur_node is not goal and cur_node is not start:
-            cur_node.char = "•"
-        cur_node = cur_node.parent
-    return path
-
-
-
-def draw_path_console(map):
-    """
-    :param map:
-    :return:
-    """
-    final = []
-    string = ""
-    for line in map:
-        row = []
-        for node in line:
-            row.append(node)
-            string += node.char
-        final.append(row)
-        string += "\n"
-    print(string)
-    return final
-
-
-def generate_all_successors(node, possible_nodes):
-    """
-    :param node:
-    :param possible_nodes:
-    :return:
-    """
-    for row in possible_nodes:
-        for n in row:
-            if (n.x == node.x +1 and n.y == node.y) or\
-            (n.x == node.x - 1 and n.y == node.y) or\
-            (n.x == node.x and n.y == node.y + 1) or\
-            (n.x == node.x and n.y == node.y - 1):
-                if not n.is_wall:
-                    node.children.append(n)
-    
-
-def attach_and_eval(child, parent, board):
-    """
-    :param child:
-    :param parent:
-    :param board:
-    :return:
-    """
-    child.parent = parent
-    child.g = parent.g + child.cost
-    child.h = abs(board.goal.x - child.x) + abs(board.goal.y - child.y)
-
-
-def propogate_path_improvements(node):
-    """
-    :param node:
-    :return:
-    """
-    for child in node.children:
-        if node.g + child.cost < child.g:
-            child.parent = node
-            child.g = node.g + child.cost
-            propogate_path_improvements(child)
-
-
-def draw_task_1(map, grid):
-    """
-    Using tkinter to visually plot the maze
-    :param map:
-    :param grid:
-    :return:
-    """
-    master = Tk()
-    w = Canvas(master, width=600, height=210)
-    w.pack()
-
-    # Creating the grid
-    for i in range(0, 601, 30):
-        w.create_line(i, 0, i, 210, fill="black")
-    for i in range(0, 211, 30):
-        w.create_line(0, i, 600, i, fill="black")
-
-    # Drawing the initial canvas, then running the algorithm, and filling it in
-    for j in range(len(map)):
-        for i in range(len(map[0])):
-            if map[j][i].char == "#":
-                w.create_rectangle(i * 30, j * 30, (i + 1) * 30, (j + 1) * 30, fill="grey")
-            elif map[j][i].char == ".":
-                w.create_rectangle(i * 30, j * 30, (i + 1) * 30, (j + 1) * 30, fill="white")
-            elif map[j][i].char == "A":
-                w.create_rectangle(i * 30, j * 30, (i + 1) * 30, (j + 1) * 30, fill="red")
-                w.create_text(i * 30 + 15, j * 30 + 15, font="Times 20", text="A")
-            elif map[j][i].char == "B":
-                w.create_rectangle(i * 30, j * 30, (i + 1) * 30, (j + 1) * 30, fill="light green")
-                w.create_text(i * 30 + 15, j * 30 + 15, font="Times 20", text="B")
-    for j in range(len(grid)):
-            for i in range(len(grid[0])):
-                if grid[j][i].char == "•":
-                    w.create_rectangle(i * 30, j * 30, (i + 1) * 30, (j + 1) * 30, fill="black")
-                    w.create_text(i * 30 + 15, j * 30 + 15, font="Times 20", text="•", fill="white")
-                elif grid[j][i].char == "x":
-                    w.create_text(i * 30 + 15, j * 30 + 15, font="Times 20", text="x")
-                elif grid[j][i].char == "*":
-                    w.create_text(i * 30 + 15, j * 30 + 15, font="Times 20", text="*")
-    mainloop()
-
-
-def draw_task_2(map, grid):
-    """
-    Using tkinter to visually plot the maze
-    :param map:
-    :param grid:
-    :return:
-    """
-    master = Tk()
-    w = Canvas(master, width=800, height=200)
-    w.pack()
-
-    # Creating the grid
-    for i in range(0, 801, 20):
-        w.create_line(i, 0, i, 200, fill="black")
-    for i in range(0, 201, 20):
-        w.create_line(0, i, 800, i, fill="black")
-    # Drawing the initial canvas, then running the algorithm, and filling it in
-    for j in range(len(map)):
-        for i in range(len(map[0])):
-            if map[j][i].char == "w":
-                w.create_rectangle(i * 20, j * 20, (i + 1) * 20, (j + 1) * 20, fill="blue")
-            elif map[j][i].char == "r":
-                w.create_rectangle(i * 20, j * 20, (i + 1) * 20, (j + 1) * 20, fill="chocolate")
-            elif map[j][i].char == "f":
-                w.create_rectangle(i * 20, j * 20, (i + 1) * 20, (j + 1) * 20, fill="dark green")
-            elif map[j][i].char == "g":
-                w.create_rectangle(i * 20, j * 20, (i + 1) * 20, (j + 1) * 20, fill="light green")
-            elif map[j][i].char == "m":
-                w.create_rectangle(i * 20, j * 20, (i + 1) * 20, (j + 1) * 20, fill="grey")
-            elif map[j][i].char == "A":
-                w.create_rectangle(i * 20, j * 20, (i + 1) * 20, (j + 1) * 20, fill="red")
-                w.create_text(i * 20+ 10, j * 20 + 10, font="Times 20", text="A")
-            elif map[j][i].char == "B":
-                w.create_rectangle(i * 20, j * 20, (i + 1) * 20, (j + 1) * 20, fill="yellow")
-                w.create_text(i * 20 + 10, j * 20 + 10, font="Times 20", text="B")
-    for j in range(len(grid)):
-            for i in range(len(grid[0])):
-                if grid[j][i].char == "•":
-                    w.create_rectangle(i * 20, j * 20, (i + 1) * 20, (j + 1) * 20, fill="black")
-                    w.create_text(i * 20 + 10, j * 20 + 10, font="Times 20", text="•", fill="white")
-                elif grid[j][i].char == "x":
-                    w.create_text(i * 20 + 10, j * 20 + 10, font="Times 20", text="x")
-                    w.create_text(i * 20 + 10, j * 20 + 10, font="Times 20", text="*")
-    mainloop()
-
-
-def main():
-    files1 = glob(r'./boards/boards1/*.txt')
-    for file in files1:
-        board, nodes = make_board(file)
-        path, map = a_star(board)
-        final = draw_path_console(map)
-        draw_task_1(map, final)
-
-    files2 = glob(r'./boards/boards2/*.txt')
-    for file in files2:
-        board, nodes = make_board(file)
-        path, map = a_star(board)
-        final = draw_path_console(map)
-        draw_task_2(map, final)
-
-main()
\ No newline at end of file
+from array import array
+from collections import OrderedDict, deque
+import math
+import mmap
+import os
+import struct
+import sys
+import time
+
+# Modules only some entry points need (tkinter through gui, multiprocessing, argparse,
+# glob, hashlib, base64, json, render) are imported inside those functions, so importing
+# a_star as a library stays cheap and has no side effects.
+
+
+# Cost of entering a cell, by the letter used for it in the board files
+COSTS = {'w':100, 'm': 50, 'f': 10, 'g': 5, 'r': 1, '.': 1}
+
+# Search state of a node, kept on the node itself for O(1) membership tests
+UNSEEN, OPEN, CLOSED = 0, 1, 2
+
+
+class Node:
+    """
+    Node object to obtain the various states and attributes of a node
+    """
+    def __init__(self, x_pos, y_pos, wall, cost, char):
+        self.x = x_pos              # X-position in board
+        self.y = y_pos              # Y-position in board
+        self.g = float('inf')       # cost of getting to this node
+        self.h = None               # estimated cost to goal
+        self.is_wall = wall         # if True, then it is a wall
+        self.parent = None          # pointer to best parent node
+        self.cost = cost            # arc_cost?
+        self.children = []          # list of all successor nodes
+        self.is_goal = False        # Set to True if the node is the goal
+        self.char = char
+        self.state = UNSEEN         # UNSEEN, OPEN or CLOSED
+
+    def f(self):
+        return self.g + self.h      # estimated total cost of a solution path
+
+    def __repr__(self):
+        return "[" + str(self.x) + "," + str(self.y) + "]"
+
+    def __str__(self):
+        return "[" + str(self.x) + "," + str(self.y) + "]"
+
+
+class IndexedHeap:
+    """
+    Binary min-heap of nodes with an index of each node's position,
+    so the priority of a node already in the heap can be lowered in place.
+    Ties on priority are broken by insertion order (FIFO).
+    """
+    def __init__(self):
+        self.heap = []              # list of [priority, sequence, node]
+        self.position = {}          # node -> index in self.heap
+        self.counter = 0            # insertion sequence used for tie-breaking
+        self.pushes = 0
+        self.pops = 0
+        self.peak = 0               # largest size reached
+
+    def push(self, node, priority):
+        entry = [priority, self.counter, node]
+        self.counter += 1
+        self.pushes += 1
+        self.heap.append(entry)
+        self.position[node] = len(self.heap) - 1
+        if len(self.heap) > self.peak:
+            self.peak = len(self.heap)
+        self._sift_up(len(self.heap) - 1)
+
+    def pop(self):
+        self.pops += 1
+        last = self.heap.pop()
+        if not self.heap:
+            del self.position[last[2]]
+            return last[2]
+        top = self.heap[0]
+        self.heap[0] = last
+        self.position[last[2]] = 0
+        del self.position[top[2]]
+        self._sift_down(0)
+        return top[2]
+
+    def decrease_key(self, node, priority):
+        """
+        Lower the priority of a node in the heap. The node is ordered after
+        earlier entries of equal priority, as if it had just been inserted.
+        """
+        i = self.position[node]
+        self.heap[i][0] = priority
+        self.heap[i][1] = self.counter
+        self.counter += 1
+        self._sift_up(i)
+
+    def update(self, node, priority):
+        """
+        Change the priority of a node in the heap, up or down
+        """
+        i = self.position[node]
+        self.heap[i][0] = priority
+        self._sift_up(i)
+        self._sift_down(self.position[node])
+
+    def remove(self, node):
+        i = self.position.pop(node)
+        last = self.heap.pop()
+        if i < len(self.heap):
+            self.heap[i] = last
+            self.position[last[2]] = i
+            self._sift_up(i)
+            self._sift_down(self.position[last[2]])
+
+    def top(self):
+        return self.heap[0][2]
+
+    def _less(self, i, j):
+        a, b = self.heap[i], self.heap[j]
+        return a[0] < b[0] or (a[0] == b[0] and a[1] < b[1])
+
+    def _swap(self, i, j):
+        heap = self.heap
+        heap[i], heap[j] = heap[j], heap[i]
+        self.position[heap[i][2]] = i
+        self.position[heap[j][2]] = j
+
+    def _sift_up(self, i):
+        while i > 0:
+            parent = (i - 1) // 2
+            if not self._less(i, parent):
+                break
+            self._swap(i, parent)
+            i = parent
+
+    def _sift_down(self, i):
+        n = len(self.heap)
+        while True:
+            smallest = i
+            for child in (2 * i + 1, 2 * i + 2):
+                if child < n and self._less(child, smallest):
+                    smallest = child
+            if smallest == i:
+                break
+            self._swap(i, smallest)
+            i = smallest
+
+    def top_priority(self):
+        return self.heap[0][0]
+
+    def __contains__(self, node):
+        return node in self.position
+
+    def __len__(self):
+        return len(self.heap)
+
+
+class SearchStats:
+    """
+    Counters and per-phase wall-clock times (in seconds) of one search
+    """
+    PHASES = ("parse", "search", "path", "render")
+
+    def __init__(self):
+        self.expansions = 0         # nodes taken off the open list and expanded
+        self.generated = 0          # successors looked at during expansions
+        self.reopened = 0           # nodes whose cost dropped after they were expanded
+        self.heap_pushes = 0
+        self.heap_pops = 0
+        self.peak_open = 0          # largest open list size
+        self.peak_nodes = 0         # most search nodes held at once (memory-bounded searches)
+        self.timings = dict.fromkeys(self.PHASES, 0.0)
+
+    def as_dict(self):
+        return {
+            "expansions": self.expansions,
+            "generated": self.generated,
+            "reopened": self.reopened,
+            "heap_pushes": self.heap_pushes,
+            "heap_pops": self.heap_pops,
+            "peak_open": self.peak_open,
+            "peak_nodes": self.peak_nodes,
+            "timings": dict(self.timings),
+        }
+
+    def to_json(self):
+        import json
+        return json.dumps(self.as_dict(), sort_keys=True)
+
+    def __str__(self):
+        return self.to_json()
+
+
+class Board:
+    """
+    Create a Board-object to hold the state of the board
+    """
+    def __init__(self, nodes, start, goal, board_path):
+        self.nodes = nodes
+        self.start = start  
+        self.goal = goal
+
+        self.open_nodes = [start]
+        self.closed_nodes = []
+        start.state = OPEN
+
+        self.height = len(nodes)
+        self.width = len(nodes[0]) if nodes else 0
+        self.adjacency = None   # optional (offsets, targets) from build_adjacency()
+        costs = set(n.cost for row in nodes for n in row if not n.is_wall)
+        self.uniform_cost = costs.pop() if len(costs) == 1 else None
+
+        self.name = board_path.strip(".txt")
+
+    def __str__(self):
+        return str(self.name.strip("/boards"))
+
+
+def make_board(board_path, adjacency=False, cache=True):
+    """
+    Create a board based on reading lines from a .txt-file, or from a compiled .astb-file.
+    With cache, a text board goes through the on-disk cache of make_compact_board() and
+    the Nodes are built straight from the compiled cost bytes instead of the text.
+    :param board_path: file.txt or file.astb
+    :param adjacency: if True, precompute the neighbour lists with build_adjacency()
+    :param cache: use and fill the on-disk cache of compiled boards
+    :return: Board
+    """
+    if cache or board_path.endswith(COMPILED_SUFFIX):
+        nodes, start, goal = compact_board_nodes(make_compact_board(board_path))
+    else:
+        nodes, start, goal = parse_board_nodes(board_path)
+    goal.h = 0
+    start.h = abs(goal.x - start.x) + abs(goal.y - start.y)
+    start.g = 0
+    board = Board(nodes, start, goal, board_path)
+    if adjacency:
+        board.adjacency = build_adjacency(nodes)
+    return board, nodes
+
+
+def parse_board_nodes(board_path):
+    """
+    Read the Nodes of a board from its .txt-file
+    :param board_path: file.txt
+    :return: rows of Nodes, the start Node and the goal Node
+    """
+    costs = COSTS
+    nodes = []
+    start, goal = None, None
+    file = open(board_path, "r")
+    lines = [line.strip('\n') for line in file]
+    for i in range(len(lines)):
+        row = []
+        for j in range(len(lines[i])):
+            letter = lines[i][j]
+            if letter in costs.keys():
+                cost = costs[letter]
+                node = Node(i, j, False, cost, letter)
+                row.append(node)
+            elif lines[i][j] == "A":
+                start = Node(i, j, False, 1, "A")
+                #print("-----\tSTART IS SET-----\n", start)
+                row.append(start)
+            elif lines[i][j] == "B":
+                goal = Node(i, j, False, 1, "B")
+                goal.is_goal = True
+                #print("-----\tGOAL IS SET-----\n", goal)
+                row.append(goal)
+            elif lines[i][j] == '#':
+                wall_node = Node(i, j, True, float('inf'), "#")
+                row.append(wall_node)
+        nodes.append(row)
+    return nodes, start, goal
+
+
+def compact_board_nodes(board):
+    """
+    Build the Nodes of a CompactBoard from its cost bytes, lettered as by compiled_board_lines()
+    :param board: CompactBoard
+    :return: rows of Nodes, the start Node and the goal Node
+    """
+    letters = cost_letters(board)
+    cost, width = board.cost, board.width
+    nodes = []
+    for i in range(board.height):
+        row = []
+        for j, c in enumerate(cost[i * width:(i + 1) * width]):
+            if c:
+                row.append(Node(i, j, False, c, letters[c]))
+            else:
+                row.append(Node(i, j, True, float('inf'), "#"))
+        nodes.append(row)
+    start, goal = None, None
+    if board.start is not None:
+        x, y = board.coords(board.start)
+        start = nodes[x][y] = Node(x, y, False, 1, "A")
+    if board.goal is not None:
+        x, y = board.coords(board.goal)
+        goal = nodes[x][y] = Node(x, y, False, 1, "B")
+        goal.is_goal = True
+    return nodes, start, goal
+
+
+def build_adjacency(nodes):
+    """
+    Precompute the open orthogonal neighbours of every cell in CSR form.
+    Cell (x, y) has linear index x * width + y, and its neighbours are
+    targets[offsets[i]:offsets[i + 1]], in the order generate_all_successors() uses.
+    :param nodes: list of rows of Node
+    :return: (offsets, targets) as arrays of ints
+    """
+    width = len(nodes[0])
+    offsets = array('l', [0])
+    targets = array('l')
+    for row in nodes:
+        for node in row:
+            if not node.is_wall:
+                for n in neighbours(node, nodes):
+                    targets.append(n.x * width + n.y)
+            offsets.append(len(targets))
+    return offsets, targets
+
+
+class CompactBoard:
+    """
+    Board stored as a flat cost array indexed by linear cell id (x * width + y)
+    instead of one Node object per cell. A cost of 0 marks a wall.
+    The board is never modified by a search; per-query state lives in a PathEngine.
+    """
+    def __init__(self, cost, width, height, start, goal, board_path):
+        self.cost = cost            # bytearray (or other byte buffer) of cell costs
+        self.width = width
+        self.height = height
+        self.start = start          # linear cell id of A
+        self.goal = goal            # linear cell id of B
+        self.uniform_cost = find_uniform_cost(cost)
+
+        self.name = board_path.strip(".txt")
+
+    def cell(self, x, y):
+        return x * self.width + y
+
+    def coords(self, i):
+        return divmod(i, self.width)
+
+    def open_cell(self, pos):
+        """
+        :param pos: (x, y)
+        :return: linear cell id of pos
+        :raise ValueError: if pos is outside the board or a wall
+        """
+        x, y = pos
+        if not (0 <= x < self.height and 0 <= y < self.width):
+            raise ValueError("%r is outside the board" % (pos,))
+        i = x * self.width + y
+        if not self.cost[i]:
+            raise ValueError("%r is a wall" % (pos,))
+        return i
+
+    def __str__(self):
+        return str(self.name.strip("/boards"))
+
+
+def find_uniform_cost(cost):
+    """
+    Check whether every open cell of a cost array has the same cost
+    :param cost: array of cell costs, 0 for walls
+    :return: the shared cost, or None if costs differ or there are no open cells
+    """
+    if not isinstance(cost, (bytes, bytearray)):
+        cost = bytes(cost)
+    open_cells = cost.replace(b"\x00", b"")
+    if not open_cells or open_cells.strip(open_cells[:1]):
+        return None
+    return open_cells[0]
+
+
+# Board letter -> cost byte for bytes.translate(); 255 marks letters that are not allowed
+COST_TABLE = bytearray(b"\xff" * 256)
+for letter, letter_cost in dict(COSTS, A=1, B=1).items():
+    COST_TABLE[ord(letter)] = letter_cost
+COST_TABLE[ord("#")] = 0
+COST_TABLE = bytes(COST_TABLE)
+
+
+def make_compact_board(board_path, chunk_size=1 << 22, cache=True):
+    """
+    Create a CompactBoard from a .txt-file or a compiled .astb-file.
+    With cache, the parsed board is kept as a compiled file (see board_cache_path())
+    and later calls load that instead of parsing the text again.
+    :param board_path: file.txt or file.astb
+    :param chunk_size: approximate number of file bytes converted at a time
+    :param cache: use and fill the on-disk cache of compiled boards
+    :return: CompactBoard
+    """
+    if board_path.endswith(COMPILED_SUFFIX):
+        return load_compiled_board(board_path)
+    if not cache:
+        return parse_compact_board(board_path, chunk_size)
+    cache_path = board_cache_path(board_path)
+    try:
+        return load_compiled_board(cache_path, board_path)
+    except (OSError, ValueError):
+        pass
+    board = parse_compact_board(board_path, chunk_size)
+    try:
+        os.makedirs(os.path.dirname(cache_path), exist_ok=True)
+        save_compiled_board(board, cache_path)
+        prune_board_cache(cache_path)
+    except OSError:
+        pass
+    return board
+
+
+def parse_compact_board(board_path, chunk_size=1 << 22):
+    """
+    Create a CompactBoard from a .txt-file without a Python loop over its characters.
+    The file is memory-mapped and converted to costs with bytes.translate() and COST_TABLE,
+    a block of rows at a time, so only the cost array is ever held in memory.
+    A and B are found with mmap.find().
+    :param board_path: file.txt
+    :param chunk_size: approximate number of file bytes converted at a time
+    :return: CompactBoard
+    """
+    with open(board_path, "rb") as file:
+        if os.fstat(file.fileno()).st_size == 0:
+            return CompactBoard(bytearray(), 0, 0, None, None, board_path)
+        mm = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+    try:
+        end = len(mm)
+        while end and mm[end - 1:end] in (b"\n", b"\r"):
+            end -= 1
+        line_end = mm.find(b"\n", 0, end)
+        if line_end == -1:
+            line_end = end
+        width = line_end - 1 if line_end and mm[line_end - 1:line_end] == b"\r" else line_end
+        stride = line_end + 1                       # bytes per row including the line break
+        height = (end + stride - width) // stride
+        if (height - 1) * stride + width != end:
+            raise ValueError("%s: rows must all have the same length" % board_path)
+
+        cost = bytearray(width * height)
+        rows = max(1, chunk_size // stride)
+        for first in range(0, height, rows):
+            block = mm[first * stride:min((first + rows) * stride, end)].translate(COST_TABLE, b"\r\n")
+            if len(block) != min(rows, height - first) * width:
+                raise ValueError("%s: rows must all have the same length" % board_path)
+            if b"\xff" in block:
+                raise ValueError("%s: unknown letter in board" % board_path)
+            cost[first * width:first * width + len(block)] = block
+
+        start, goal = None, None
+        a, b = mm.find(b"A", 0, end), mm.find(b"B", 0, end)
+        if a != -1:
+            start = (a // stride) * width + a % stride
+        if b != -1:
+            goal = (b // stride) * width + b % stride
+    finally:
+        mm.close()
+    return CompactBoard(cost, width, height, start, goal, board_path)
+
+
+# Compiled boards: a header followed by width * height cost bytes (0 for walls).
+# start and goal are linear cell ids, -1 if the board has none.
+COMPILED_SUFFIX = ".astb"
+COMPILED_HEADER = struct.Struct("<4sHxxIIqq")     # magic, version, width, height, start, goal
+COMPILED_MAGIC = b"ASTB"
+COMPILED_VERSION = 1
+BOARD_CACHE_DIR = ".boardcache"
+
+
+def save_compiled_board(board, path):
+    """
+    Write a board in the compiled format
+    :param board: CompactBoard or Board
+    :param path: file.astb
+    :return:
+    """
+    if isinstance(board, Board):
+        board = to_compact_board(board)
+    start = -1 if board.start is None else board.start
+    goal = -1 if board.goal is None else board.goal
+    with open(path + ".tmp", "wb") as file:
+        file.write(COMPILED_HEADER.pack(COMPILED_MAGIC, COMPILED_VERSION,
+                                        board.width, board.height, start, goal))
+        file.write(board.cost)
+    os.replace(path + ".tmp", path)     # readers never see a half-written file
+
+
+def load_compiled_board(path, board_path=None):
+    """
+    Read a board written by save_compiled_board()
+    :param path: file.astb
+    :param board_path: name to give the board, defaults to path
+    :return: CompactBoard
+    """
+    with open(path, "rb") as file:
+        header = file.read(COMPILED_HEADER.size)
+        if len(header) != COMPILED_HEADER.size:
+            raise ValueError("%s: not a compiled board" % path)
+        magic, version, width, height, start, goal = COMPILED_HEADER.unpack(header)
+        if magic != COMPILED_MAGIC or version != COMPILED_VERSION:
+            raise ValueError("%s: not a compiled board" % path)
+        cost = bytearray(width * height)
+        if file.readinto(cost) != len(cost):
+            raise ValueError("%s: truncated compiled board" % path)
+    return CompactBoard(cost, width, height, None if start == -1 else start,
+                        None if goal == -1 else goal, board_path or path)
+
+
+def board_cache_path(board_path):
+    """
+    Where make_compact_board() caches the compiled form of a text board: a directory
+    next to the board, in a file keyed by the board's absolute path, size and mtime,
+    so an edited board gets a new cache entry
+    :param board_path: file.txt
+    :return: path of the cache file
+    """
+    import hashlib
+    info = os.stat(board_path)
+    key = "%s:%d:%d" % (os.path.abspath(board_path), info.st_size, info.st_mtime_ns)
+    name = "%s.%s%s" % (os.path.basename(board_path), hashlib.sha1(key.encode()).hexdigest()[:16],
+                        COMPILED_SUFFIX)
+    return os.path.join(os.path.dirname(board_path), BOARD_CACHE_DIR, name)
+
+
+def cost_letters(board):
+    """
+    :param board: CompactBoard
+    :return: list of the letter for each cell cost 0-255, "?" for costs no letter has
+    """
+    letters = {0: "#", 1: "." if board.uniform_cost else "r"}
+    letters.update((c, letter) for letter, c in COSTS.items() if c != 1)
+    return [letters.get(c, "?") for c in range(256)]
+
+
+def prune_board_cache(cache_path):
+    """
+    Remove the entries an edited board left behind: every other file in the cache
+    directory named like board_cache_path() gives for the same board file name
+    :param cache_path: the entry just written
+    :return:
+    """
+    directory, name = os.path.split(cache_path)
+    # <board file name>.<16 hex digits><COMPILED_SUFFIX>
+    prefix = name[:-len(COMPILED_SUFFIX) - 16]
+    for other in os.listdir(directory):
+        if (other != name and other.startswith(prefix) and other.endswith(COMPILED_SUFFIX)
+                and len(other) == len(name)
+                and all(c in "0123456789abcdef" for c in other[len(prefix):-len(COMPILED_SUFFIX)])):
+            try:
+                os.remove(os.path.join(directory, other))
+            except OSError:
+                pass
+
+
+def compiled_board_lines(board):
+    """
+    Turn a CompactBoard back into the text rows of a board file. Cells of cost 1
+    become "." on uniform-cost boards and "r" on terrain boards.
+    :param board: CompactBoard
+    :return: list of str
+    """
+    letters = cost_letters(board)
+    table = bytes(ord(letters[c]) for c in range(256))
+    text = bytearray(bytes(board.cost).translate(table))
+    for cell, letter in ((board.start, b"A"), (board.goal, b"B")):
+        if cell is not None:
+            text[cell:cell + 1] = letter
+    text = text.decode("ascii")
+    return [text[i:i + board.width] for i in range(0, len(text), board.width)]
+
+
+def to_compact_board(board):
+    """
+    Convert a Node-based Board into a CompactBoard with the same costs
+    :param board: Board
+    :return: CompactBoard
+    """
+    cost = array('B', [0 if n.is_wall else n.cost for row in board.nodes for n in row])
+    return CompactBoard(cost, board.width, board.height,
+                        board.start.x * board.width + board.start.y,
+                        board.goal.x * board.width + board.goal.y, board.name)
+
+
+ALGORITHMS = ("astar", "bidirectional", "jps")
+# grid4: up, down, left, right; grid8: also diagonals; theta: any angle (Theta*)
+MOVEMENTS = ("grid4", "grid8", "theta")
+DIAGONAL = math.sqrt(2)
+
+
+def a_star(board, open_list="heap", algorithm="astar", epsilon=1.0, heuristic=None, stats=None, movement="grid4"):
+    """
+    Basically pseudocode to python implementation of A* algorithm
+    (Humble version: my first time implementing A*)
+    :param board: Board
+    :param open_list: "heap" for an IndexedHeap with decrease-key, "list" for the sorted list
+    :param algorithm: one of ALGORITHMS; anything but "astar" runs on a CompactBoard copy of a Board
+    :param epsilon: heuristic inflation for weighted A*; paths cost at most epsilon times the optimum
+    :param heuristic: None for Manhattan distance, or an estimate factory as in PathEngine.query()
+    :param stats: SearchStats to fill in with counters and the search and path times
+    :param movement: one of MOVEMENTS; anything but "grid4" runs on a CompactBoard copy of a Board
+    :return: path from goal back to start (start excluded) as [x, y] lists, or None if B cannot
+             be reached, and the board's nodes (the CompactBoard itself for a CompactBoard)
+    """
+    if algorithm not in ALGORITHMS:
+        raise ValueError("algorithm must be one of %s, not %r" % (", ".join(ALGORITHMS), algorithm))
+    if movement not in MOVEMENTS:
+        raise ValueError("movement must be one of %s, not %r" % (", ".join(MOVEMENTS), movement))
+    if isinstance(board, CompactBoard):
+        return a_star_compact(board, algorithm, epsilon, heuristic, stats, movement)
+    if algorithm != "astar" or epsilon != 1 or heuristic is not None or movement != "grid4":
+        path, compact = a_star_compact(to_compact_board(board), algorithm, epsilon, heuristic, stats, movement)
+        if path is None:
+            return None, board.nodes
+        start = (board.start.x, board.start.y)
+        for x, y in path_cells(start, path)[1:]:
+            board.nodes[x][y].char = "•"
+        return path, board.nodes
+
+    use_heap = open_list == "heap"
+    if use_heap:
+        heap = IndexedHeap()
+        for node in board.open_nodes:
+            heap.push(node, node.f())
+        board.open_nodes = heap
+    elif open_list != "list":
+        raise ValueError("open_list must be 'heap' or 'list', not %r" % (open_list,))
+    if stats is None:
+        stats = SearchStats()
+    elif not use_heap:
+        stats.heap_pushes += len(board.open_nodes)
+    began = time.perf_counter()
+
+    while True:
+        if not board.open_nodes:
+            stats.timings["search"] = time.perf_counter() - began
+            if use_heap:
+                stats.heap_pushes += board.open_nodes.pushes
+                stats.heap_pops += board.open_nodes.pops
+                stats.peak_open = board.open_nodes.peak
+            return None, board.nodes
+        if use_heap:
+            cur_node = board.open_nodes.pop()   # init node
+        else:
+            stats.peak_open = max(stats.peak_open, len(board.open_nodes))
+            stats.heap_pops += 1
+            cur_node = board.open_nodes.pop(0)  # init node
+        board.closed_nodes.append(cur_node)     # place it in CLOSED
+        cur_node.state = CLOSED
+        stats.expansions += 1
+
+        if cur_node.is_goal:
+            print("A* success!!")
+            path_began = time.perf_counter()
+            path = make_path(cur_node, board, board.start, board.goal)
+            stats.timings["path"] = time.perf_counter() - path_began
+            stats.timings["search"] = path_began - began
+            if use_heap:
+                stats.heap_pushes += board.open_nodes.pushes
+                stats.heap_pops += board.open_nodes.pops
+                stats.peak_open = board.open_nodes.peak
+            return path, board.nodes
+
+        generate_all_successors(cur_node, board.nodes, board.adjacency)
+        for child in cur_node.children:
+            stats.generated += 1
+            if child.state == UNSEEN:
+                attach_and_eval(child, cur_node, board)
+                child.state = OPEN
+                if use_heap:
+                    board.open_nodes.push(child, child.f())
+                else:
+                    stats.heap_pushes += 1
+                    board.open_nodes.append(child)
+                    board.open_nodes.sort(key=lambda x: x.f())
+            elif cur_node.g + child.cost < child.g:
+                attach_and_eval(child, cur_node, board)
+                if use_heap and child.state == OPEN:
+                    board.open_nodes.decrease_key(child, child.f())
+                elif child.state == CLOSED:
+                    stats.reopened += 1
+                    propogate_path_improvements(child, board.open_nodes if use_heap else None)
+
+
+
+def a_star_compact(board, algorithm="astar", epsilon=1.0, heuristic=None, stats=None, movement="grid4"):
+    """
+    A* from A to B on a CompactBoard
+    :param board: CompactBoard
+    :param algorithm: one of ALGORITHMS
+    :param epsilon: heuristic inflation for weighted A*
+    :param heuristic: None for Manhattan distance, or an estimate factory as in PathEngine.query()
+    :param stats: SearchStats to fill in
+    :param movement: one of MOVEMENTS
+    :return: path from goal back to start (start excluded) as [x, y] lists, and the board
+    """
+    engine = PathEngine(board)
+    path, cost = engine.search(board.coords(board.start), board.coords(board.goal),
+                               algorithm, epsilon, heuristic, stats, movement)
+    return path, board
+
+
+def ara_star(board, epsilon=3.0, step=0.5, time_limit=None):
+    """
+    Anytime search from A to B: yields a first path found with weighted A* and then
+    better ones, see PathEngine.query_anytime()
+    :param board: Board or CompactBoard
+    :param epsilon: starting heuristic inflation
+    :param step: how much epsilon drops after each path
+    :param time_limit: seconds to keep improving, or None to run until the path is optimal
+    :return: generator of (path, cost, bound), path as in a_star()
+    """
+    if isinstance(board, Board):
+        board = to_compact_board(board)
+    deadline = None if time_limit is None else time.monotonic() + time_limit
+    engine = PathEngine(board)
+    return engine.query_anytime(board.coords(board.start), board.coords(board.goal),
+                                epsilon, step, deadline)
+
+
+def line_cells(start, end):
+    """
+    Cells a straight line between two cell centres passes through, in order
+    :param start: (x, y)
+    :param end: (x, y)
+    :return: generator of (x, y, corner), start excluded. Where the line runs exactly
+             through a cell corner, the two cells touching it from the sides come first
+             with corner True, then the cell diagonally across with corner False
+    """
+    x, y = start
+    nx, ny = abs(end[0] - x), abs(end[1] - y)
+    sx = 1 if end[0] > x else -1
+    sy = 1 if end[1] > y else -1
+    ix = iy = 0
+    while ix < nx or iy < ny:
+        # step along whichever axis the line crosses a cell border on first
+        decision = (1 + 2 * ix) * ny - (1 + 2 * iy) * nx
+        if decision == 0:
+            yield x + sx, y, True
+            yield x, y + sy, True
+            x, y, ix, iy = x + sx, y + sy, ix + 1, iy + 1
+        elif decision < 0:
+            x, ix = x + sx, ix + 1
+        else:
+            y, iy = y + sy, iy + 1
+        yield x, y, False
+
+
+def path_cells(start, path):
+    """
+    Expand a path with straight segments longer than one step (Theta*) into every cell it enters
+    :param start: (x, y) where the path begins
+    :param path: path from goal back to start (start excluded) as [x, y] lists
+    :return: the entered cells from goal back to start (start excluded) as [x, y] lists
+    """
+    cells = []
+    cur = tuple(start)
+    for x, y in reversed(path):
+        cells.extend([cx, cy] for cx, cy, corner in line_cells(cur, (x, y)) if not corner)
+        cur = (x, y)
+    cells.reverse()
+    return cells
+
+
+class PathEngine:
+    """
+    Answers any number of (start, goal) queries on one CompactBoard without
+    modifying it. g, parent and open/closed state live in scratch arrays that
+    are only valid for cells whose stamp equals the current generation, so
+    starting a new query is O(1) instead of resetting every cell.
+    """
+    def __init__(self, board):
+        self.board = board
+        size = board.width * board.height
+        self.g = array('d', [float('inf')]) * size
+        self.parent = array('l', [-1]) * size
+        self.flags = bytearray(size)        # UNSEEN, OPEN or CLOSED per cell
+        self.stamp = array('L', [0]) * size # generation that last touched a cell
+        self.generation = 0
+        self.expansions = 0                 # expansions made by the last query
+        self.generated = 0                  # successors looked at by the last query
+        self.reopened = 0                   # cells reopened by the last query (ARA*)
+        self.open_lists = []                # the IndexedHeaps the last query used
+        self.path_time = 0.0                # seconds spent building paths in the last query
+        self.backward = None                # (g, link, flags) for the backward half of query_bidirectional()
+
+    def _start_query(self):
+        """
+        Reset the per-query counters
+        """
+        self.expansions = self.generated = self.reopened = 0
+        self.open_lists = []
+        self.path_time = 0.0
+
+    def _open_list(self):
+        open_nodes = IndexedHeap()
+        self.open_lists.append(open_nodes)
+        return open_nodes
+
+    def _next_generation(self):
+        self.generation += 1
+        if self.generation >= 1 << (8 * self.stamp.itemsize):
+            self.stamp = array('L', [0]) * len(self.stamp)
+            self.generation = 1
+        return self.generation
+
+    def query(self, start, goal, epsilon=1.0, heuristic=None):
+        """
+        Find a cheapest path between two cells. With epsilon > 1 this is weighted A*
+        (f = g + epsilon * h): fewer expansions, and a path costing at most epsilon
+        times the cheapest one.
+        :param start: (x, y)
+        :param goal: (x, y)
+        :param epsilon: heuristic inflation, at least 1
+        :param heuristic: None for Manhattan distance, or a callable taking the goal's cell id
+                          and returning an estimate function of a cell id (e.g. Landmarks.heuristic);
+                          it must be consistent
+        :return: path from goal back to start (start excluded) as [x, y] lists and its cost,
+                 or (None, inf) if the goal cannot be reached
+        """
+        start, goal = self.board.open_cell(start), self.board.open_cell(goal)
+        cost = self.board.cost
+        width, height = self.board.width, self.board.height
+        g, parent, flags, stamp = self.g, self.parent, self.flags, self.stamp
+        gen = self._next_generation()
+        gx, gy = divmod(goal, width)
+        self._start_query()
+        if epsilon < 1:
+            raise ValueError("epsilon must be at least 1, not %r" % (epsilon,))
+        estimate = heuristic(goal) if heuristic is not None else None
+
+        open_nodes = self._open_list()
+        stamp[start] = gen
+        g[start] = 0
+        flags[start] = OPEN
+        sx, sy = divmod(start, width)
+        if estimate is None:
+            open_nodes.push(start, epsilon * (abs(gx - sx) + abs(gy - sy)))
+        else:
+            open_nodes.push(start, epsilon * estimate(start))
+
+        while open_nodes:
+            cur = open_nodes.pop()
+            flags[cur] = CLOSED
+            self.expansions += 1
+            if cur == goal:
+                return self._make_path(start, cur), g[cur]
+
+            x, y = divmod(cur, width)
+            for child in (cur - width if x > 0 else -1,
+                          cur - 1 if y > 0 else -1,
+                          cur + 1 if y < width - 1 else -1,
+                          cur + width if x < height - 1 else -1):
+                if child == -1 or not cost[child]:
+                    continue
+                self.generated += 1
+                if stamp[child] != gen:
+                    stamp[child] = gen
+                    g[child] = float('inf')
+                    flags[child] = UNSEEN
+                elif flags[child] == CLOSED:
+                    continue
+                new_g = g[cur] + cost[child]
+                if new_g < g[child]:
+                    g[child] = new_g
+                    parent[child] = cur
+                    if estimate is None:
+                        cx, cy = divmod(child, width)
+                        f = new_g + epsilon * (abs(gx - cx) + abs(gy - cy))
+                    else:
+                        f = new_g + epsilon * estimate(child)
+                    if flags[child] == OPEN:
+                        open_nodes.decrease_key(child, f)
+                    else:
+                        flags[child] = OPEN
+                        open_nodes.push(child, f)
+        return None, float('inf')
+
+    def search(self, start, goal, algorithm="astar", epsilon=1.0, heuristic=None, stats=None, movement="grid4"):
+        """
+        Run the query method for one of ALGORITHMS; epsilon and heuristic only apply to "astar"
+        :param stats: SearchStats to fill in with the query's counters and times
+        :param movement: one of MOVEMENTS; "grid8" and "theta" only with plain "astar"
+        :return: path from goal back to start (start excluded) as [x, y] lists and its cost
+        """
+        if algorithm != "astar" and (epsilon != 1 or heuristic is not None):
+            raise ValueError("epsilon and heuristic are only supported by the astar algorithm")
+        if movement != "grid4" and (algorithm != "astar" or epsilon != 1 or heuristic is not None):
+            raise ValueError("%s movement is only supported by the astar algorithm "
+                             "without epsilon or heuristic" % movement)
+        began = time.perf_counter()
+        if movement == "grid8":
+            result = self.query_diagonal(start, goal)
+        elif movement == "theta":
+            result = self.query_diagonal(start, goal, any_angle=True)
+        elif algorithm == "bidirectional":
+            result = self.query_bidirectional(start, goal)
+        elif algorithm == "jps":
+            result = self.query_jps(start, goal)
+        else:
+            result = self.query(start, goal, epsilon, heuristic)
+        if stats is not None:
+            self.fill_stats(stats, time.perf_counter() - began, combined=algorithm == "bidirectional")
+        return result
+
+    def query_diagonal(self, start, goal, any_angle=False):
+        """
+        A* with 8-connected moves and the octile distance as heuristic. A diagonal step
+        costs the entered cell's cost times sqrt(2) and may not cut the corner of a wall.
+        With any_angle this is Theta*: a cell may take its parent's parent as parent when
+        that cell is in line of sight, so paths run straight across open ground instead of
+        zig-zagging. A straight segment costs its length times the highest cost among the
+        cells it enters. Theta* paths are short but not always the cheapest.
+        :param start: (x, y)
+        :param goal: (x, y)
+        :param any_angle: True for Theta*
+        :return: path from goal back to start (start excluded) as [x, y] lists and its cost,
+                 or (None, inf) if the goal cannot be reached. With any_angle the path only
+                 holds the ends of its straight segments; path_cells() expands it.
+        """
+        start, goal = self.board.open_cell(start), self.board.open_cell(goal)
+        cost = self.board.cost
+        width, height = self.board.width, self.board.height
+        g, parent, flags, stamp = self.g, self.parent, self.flags, self.stamp
+        gen = self._next_generation()
+        gx, gy = divmod(goal, width)
+        self._start_query()
+
+        def h(cell):
+            x, y = divmod(cell, width)
+            dx, dy = abs(gx - x), abs(gy - y)
+            if any_angle:
+                return math.hypot(dx, dy)
+            return max(dx, dy) + (DIAGONAL - 1) * min(dx, dy)
+
+        open_nodes = self._open_list()
+        stamp[start] = gen
+        g[start] = 0
+        flags[start] = OPEN
+        parent[start] = start
+        open_nodes.push(start, h(start))
+
+        while open_nodes:
+            cur = open_nodes.pop()
+            flags[cur] = CLOSED
+            self.expansions += 1
+            if cur == goal:
+                return self._make_path(start, cur), g[cur]
+
+            x, y = divmod(cur, width)
+            up = parent[cur]
+            for dx, dy in DIRECTIONS:
+                nx, ny = x + dx, y + dy
+                if not (0 <= nx < height and 0 <= ny < width):
+                    continue
+                child = nx * width + ny
+                if not cost[child]:
+                    continue
+                if dx and dy:
+                    if not cost[nx * width + y] or not cost[x * width + ny]:
+                        continue
+                    step = cost[child] * DIAGONAL
+                else:
+                    step = cost[child]
+                self.generated += 1
+                if stamp[child] != gen:
+                    stamp[child] = gen
+                    g[child] = float('inf')
+                    flags[child] = UNSEEN
+                elif flags[child] == CLOSED:
+                    continue
+                new_g, new_parent = g[cur] + step, cur
+                if any_angle and up != cur:
+                    through = g[up] + self._segment_cost(up, child)
+                    if through < new_g:
+                        new_g, new_parent = through, up
+                if new_g < g[child]:
+                    g[child] = new_g
+                    parent[child] = new_parent
+                    f = new_g + h(child)
+                    if flags[child] == OPEN:
+                        open_nodes.decrease_key(child, f)
+                    else:
+                        flags[child] = OPEN
+                        open_nodes.push(child, f)
+        return None, float('inf')
+
+    def _segment_cost(self, a, b):
+        """
+        Cost of a straight segment between two cell centres
+        :param a: linear cell id
+        :param b: linear cell id
+        :return: its length times the highest cost of the cells it enters, or inf if it
+                 crosses a wall or squeezes past a wall corner
+        """
+        cost, width = self.board.cost, self.board.width
+        ax, ay = divmod(a, width)
+        bx, by = divmod(b, width)
+        worst = 0
+        for x, y, corner in line_cells((ax, ay), (bx, by)):
+            cell_cost = cost[x * width + y]
+            if not cell_cost:
+                return float('inf')
+            if not corner and cell_cost > worst:
+                worst = cell_cost
+        return worst * math.hypot(bx - ax, by - ay)
+
+    def fill_stats(self, stats, elapsed, combined=False):
+        """
+        Copy the counters of the last query into a SearchStats
+        :param stats: SearchStats
+        :param elapsed: wall time of the query in seconds, path building included
+        :param combined: True if the open lists were alive at the same time (bidirectional)
+                         rather than one after the other (ARA* passes)
+        :return:
+        """
+        stats.expansions = self.expansions
+        stats.generated = self.generated
+        stats.reopened = self.reopened
+        stats.heap_pushes = sum(h.pushes for h in self.open_lists)
+        stats.heap_pops = sum(h.pops for h in self.open_lists)
+        peaks = [h.peak for h in self.open_lists] or [0]
+        stats.peak_open = sum(peaks) if combined else max(peaks)
+        stats.timings["path"] = self.path_time
+        stats.timings["search"] = elapsed - self.path_time
+
+    def query_anytime(self, start, goal, epsilon=3.0, step=0.5, deadline=None):
+        """
+        Anytime Repairing A* (ARA*). Runs weighted A* with a high epsilon for a quick
+        first path, then lowers epsilon by step and repairs the search, reusing the
+        work already done, until epsilon reaches 1 or the deadline passes.
+        Each path found is yielded with a bound on how far it can be from the optimum.
+        :param start: (x, y)
+        :param goal: (x, y)
+        :param epsilon: starting heuristic inflation, at least 1
+        :param step: how much epsilon drops after each path
+        :param deadline: time.monotonic() value to stop at, or None to run until optimal
+        :return: generator of (path, cost, bound) with cost <= bound * optimal cost;
+                 the last bound is 1 unless the deadline passed first
+        """
+        start, goal = self.board.open_cell(start), self.board.open_cell(goal)
+        if epsilon < 1:
+            raise ValueError("epsilon must be at least 1, not %r" % (epsilon,))
+        cost = self.board.cost
+        width, height = self.board.width, self.board.height
+        g, parent, flags, stamp = self.g, self.parent, self.flags, self.stamp
+        gen = self._next_generation()
+        gx, gy = divmod(goal, width)
+        self._start_query()
+
+        def h(cell):
+            x, y = divmod(cell, width)
+            return abs(gx - x) + abs(gy - y)
+
+        stamp[start] = stamp[goal] = gen
+        g[goal] = float('inf')
+        flags[goal] = UNSEEN
+        g[start] = 0
+        flags[start] = OPEN
+        open_nodes = self._open_list()
+        open_nodes.push(start, epsilon * h(start))
+        inconsistent = set()    # improved after being expanded in the current pass
+        closed = []
+
+        while True:
+            # improve the path with the current epsilon
+            while open_nodes and g[goal] > open_nodes.top_priority():
+                if deadline is not None and time.monotonic() > deadline:
+                    return
+                cur = open_nodes.pop()
+                flags[cur] = CLOSED
+                closed.append(cur)
+                self.expansions += 1
+                x, y = divmod(cur, width)
+                for child in (cur - width if x > 0 else -1,
+                              cur - 1 if y > 0 else -1,
+                              cur + 1 if y < width - 1 else -1,
+                              cur + width if x < height - 1 else -1):
+                    if child == -1 or not cost[child]:
+                        continue
+                    if stamp[child] != gen:
+                        stamp[child] = gen
+                        g[child] = float('inf')
+                        flags[child] = UNSEEN
+                    self.generated += 1
+                    new_g = g[cur] + cost[child]
+                    if new_g < g[child]:
+                        g[child] = new_g
+                        parent[child] = cur
+                        f = new_g + epsilon * h(child)
+                        if flags[child] == CLOSED:
+                            inconsistent.add(child)
+                        elif flags[child] == OPEN:
+                            open_nodes.decrease_key(child, f)
+                        else:
+                            flags[child] = OPEN
+                            open_nodes.push(child, f)
+
+            if g[goal] == float('inf'):
+                return
+            pending = [entry[2] for entry in open_nodes.heap] + list(inconsistent)
+            lowest = min([g[cell] + h(cell) for cell in pending] or [g[goal]])
+            bound = min(epsilon, g[goal] / lowest) if lowest else epsilon
+            # parents improved after their children were expanded can make the
+            # path cheaper than g[goal], so report what the path actually costs
+            path = self._make_path(start, goal)
+            yield path, sum(cost[x * width + y] for x, y in path), max(bound, 1.0)
+            if epsilon <= 1:
+                return
+
+            # next pass: lower epsilon, reopen inconsistent cells, forget CLOSED
+            epsilon = max(1.0, epsilon - step)
+            for cell in closed:
+                if flags[cell] == CLOSED:
+                    flags[cell] = UNSEEN
+            closed = []
+            open_nodes = self._open_list()
+            self.reopened += len(inconsistent)
+            for cell in pending:
+                flags[cell] = OPEN
+                open_nodes.push(cell, g[cell] + epsilon * h(cell))
+            inconsistent = set()
+
+    def query_bidirectional(self, start, goal):
+        """
+        Bidirectional A*: a forward search from start (heuristic: Manhattan distance to goal)
+        and a backward search from goal (heuristic: Manhattan distance to start), expanding
+        whichever frontier is smaller. Both heuristics are consistent, so the search can stop
+        as soon as either frontier's smallest f reaches the cheapest meeting cost found.
+        :param start: (x, y)
+        :param goal: (x, y)
+        :return: path from goal back to start (start excluded) as [x, y] lists and its cost,
+                 or (None, inf) if the goal cannot be reached
+        """
+        start, goal = self.board.open_cell(start), self.board.open_cell(goal)
+        if self.backward is None:
+            size = len(self.g)
+            self.backward = (array('d', [float('inf')]) * size, array('l', [-1]) * size, bytearray(size))
+        cost = self.board.cost
+        width, height = self.board.width, self.board.height
+        stamp = self.stamp
+        gen = self._next_generation()
+        self._start_query()
+        sx, sy = divmod(start, width)
+        gx, gy = divmod(goal, width)
+
+        # per direction: g, parent link, flags, open list, heuristic target, forward?
+        forward = (self.g, self.parent, self.flags, self._open_list(), gx, gy, True)
+        backward = self.backward + (self._open_list(), sx, sy, False)
+        for g, link, flags, open_nodes, tx, ty, is_forward in (forward, backward):
+            cell = start if is_forward else goal
+            if stamp[cell] != gen:
+                stamp[cell] = gen
+                self.g[cell] = self.backward[0][cell] = float('inf')
+                self.flags[cell] = self.backward[2][cell] = UNSEEN
+            g[cell] = 0
+            flags[cell] = OPEN
+            x, y = divmod(cell, width)
+            open_nodes.push(cell, abs(tx - x) + abs(ty - y))
+
+        best, meet = (0, start) if start == goal else (float('inf'), -1)
+        while forward[3] and backward[3]:
+            if max(forward[3].top_priority(), backward[3].top_priority()) >= best:
+                break
+            side, other = (forward, backward) if len(forward[3]) <= len(backward[3]) else (backward, forward)
+            g, link, flags, open_nodes, tx, ty, is_forward = side
+            other_g = other[0]
+            cur = open_nodes.pop()
+            flags[cur] = CLOSED
+            self.expansions += 1
+
+            x, y = divmod(cur, width)
+            for child in (cur - width if x > 0 else -1,
+                          cur - 1 if y > 0 else -1,
+                          cur + 1 if y < width - 1 else -1,
+                          cur + width if x < height - 1 else -1):
+                if child == -1 or not cost[child]:
+                    continue
+                self.generated += 1
+                if stamp[child] != gen:
+                    stamp[child] = gen
+                    self.g[child] = self.backward[0][child] = float('inf')
+                    self.flags[child] = self.backward[2][child] = UNSEEN
+                elif flags[child] == CLOSED:
+                    continue
+                # forward moves into child, backward moves from child into cur
+                new_g = g[cur] + (cost[child] if is_forward else cost[cur])
+                if new_g < g[child]:
+                    g[child] = new_g
+                    link[child] = cur
+                    cx, cy = divmod(child, width)
+                    f = new_g + abs(tx - cx) + abs(ty - cy)
+                    if flags[child] == OPEN:
+                        open_nodes.decrease_key(child, f)
+                    else:
+                        flags[child] = OPEN
+                        open_nodes.push(child, f)
+                    if new_g + other_g[child] < best:
+                        best, meet = new_g + other_g[child], child
+
+        if meet == -1:
+            return None, float('inf')
+        path = []
+        cur = meet
+        while cur != goal:
+            cur = self.backward[1][cur]
+            path.append(list(divmod(cur, width)))
+        path.reverse()
+        return path + self._make_path(start, meet), best
+
+    def query_jps(self, start, goal):
+        """
+        Jump Point Search for 4-connected boards where every open cell has the same cost.
+        Paths are put in a canonical order (vertical moves before horizontal ones), so a
+        horizontal jump only stops where a wall forces a turn and a vertical jump stops
+        where a horizontal jump from it would stop. Only those jump points enter the open
+        list; the paths cost the same as query().
+        :param start: (x, y)
+        :param goal: (x, y)
+        :return: path from goal back to start (start excluded) as [x, y] lists and its cost,
+                 or (None, inf) if the goal cannot be reached
+        """
+        unit = self.board.uniform_cost
+        if unit is None:
+            raise ValueError("jump point search needs a board where all open cells cost the same")
+        start, goal = self.board.open_cell(start), self.board.open_cell(goal)
+        width = self.board.width
+        g, parent, flags, stamp = self.g, self.parent, self.flags, self.stamp
+        gen = self._next_generation()
+        gx, gy = divmod(goal, width)
+        self._start_query()
+
+        open_nodes = self._open_list()
+        stamp[start] = gen
+        g[start] = 0
+        parent[start] = -1
+        flags[start] = OPEN
+        sx, sy = divmod(start, width)
+        open_nodes.push(start, unit * (abs(gx - sx) + abs(gy - sy)))
+
+        while open_nodes:
+            cur = open_nodes.pop()
+            flags[cur] = CLOSED
+            self.expansions += 1
+            if cur == goal:
+                return self._make_jps_path(start, cur), g[cur]
+
+            x, y = divmod(cur, width)
+            for dx, dy in self._jps_directions(cur):
+                if dx:
+                    child = self._jump_vertical(x, y, dx, goal)
+                else:
+                    child = self._jump_horizontal(x, y, dy, goal)
+                if child == -1:
+                    continue
+                self.generated += 1
+                if stamp[child] != gen:
+                    stamp[child] = gen
+                    g[child] = float('inf')
+                    flags[child] = UNSEEN
+                elif flags[child] == CLOSED:
+                    continue
+                cx, cy = divmod(child, width)
+                new_g = g[cur] + unit * (abs(cx - x) + abs(cy - y))
+                if new_g < g[child]:
+                    g[child] = new_g
+                    parent[child] = cur
+                    f = new_g + unit * (abs(gx - cx) + abs(gy - cy))
+                    if flags[child] == OPEN:
+                        open_nodes.decrease_key(child, f)
+                    else:
+                        flags[child] = OPEN
+                        open_nodes.push(child, f)
+        return None, float('inf')
+
+    def _is_open(self, x, y):
+        board = self.board
+        return 0 <= x < board.height and 0 <= y < board.width and board.cost[x * board.width + y] != 0
+
+    def _jps_directions(self, cur):
+        """
+        Directions worth jumping in from a jump point, given the direction it was reached in
+        """
+        p = self.parent[cur]
+        if p == -1:
+            return ((-1, 0), (0, -1), (0, 1), (1, 0))
+        x, y = divmod(cur, self.board.width)
+        px, py = divmod(p, self.board.width)
+        if x != px:
+            dx = 1 if x > px else -1
+            return ((dx, 0), (0, -1), (0, 1))
+        dy = 1 if y > py else -1
+        directions = [(0, dy)]
+        for dx in (-1, 1):
+            if self._is_open(x + dx, y) and not self._is_open(x + dx, y - dy):
+                directions.append((dx, 0))
+        return directions
+
+    def _jump_horizontal(self, x, y, dy, goal):
+        """
+        Step along a row until the goal, a forced turn, or a wall
+        :return: linear cell id of the jump point, or -1
+        """
+        is_open = self._is_open
+        while True:
+            y += dy
+            if not is_open(x, y):
+                return -1
+            cell = x * self.board.width + y
+            if cell == goal:
+                return cell
+            for dx in (-1, 1):
+                if is_open(x + dx, y) and not is_open(x + dx, y - dy):
+                    return cell
+
+    def _jump_vertical(self, x, y, dx, goal):
+        """
+        Step along a column until the goal, a cell with a horizontal jump point, or a wall
+        :return: linear cell id of the jump point, or -1
+        """
+        while True:
+            x += dx
+            if not self._is_open(x, y):
+                return -1
+            cell = x * self.board.width + y
+            if cell == goal:
+                return cell
+            if self._jump_horizontal(x, y, -1, goal) != -1 or self._jump_horizontal(x, y, 1, goal) != -1:
+                return cell
+
+    def _make_jps_path(self, start, cur):
+        """
+        Follow parent jump points back from cur to start, filling in the cells between them
+        :return: path from cur back to start (start excluded) as [x, y] lists
+        """
+        began = time.perf_counter()
+        width = self.board.width
+        path = []
+        while cur != start:
+            x, y = divmod(cur, width)
+            px, py = divmod(self.parent[cur], width)
+            dx = (px > x) - (px < x)
+            dy = (py > y) - (py < y)
+            while (x, y) != (px, py):
+                path.append([x, y])
+                x, y = x + dx, y + dy
+            cur = self.parent[cur]
+        self.path_time += time.perf_counter() - began
+        return path
+
+    def _make_path(self, start, cur):
+        """
+        Follow parent ids back from cur to start
+        :param start: linear cell id
+        :param cur: linear cell id
+        :return: path from cur back to start (start excluded) as [x, y] lists
+        """
+        began = time.perf_counter()
+        path = []
+        while cur != start:
+            path.append(list(divmod(cur, self.board.width)))
+            cur = self.parent[cur]
+        self.path_time += time.perf_counter() - began
+        return path
+
+
+class CostField:
+    """
+    Cheapest path costs between one cell and every other cell of a CompactBoard,
+    from a single Dijkstra search. With reverse=True (many-to-one) the field holds
+    the cost from each cell to the given cell; with reverse=False (one-to-many) the
+    cost from the given cell to each cell. A path query then just follows the
+    stored links, in O(path length).
+    """
+    def __init__(self, board, cell, reverse=True):
+        """
+        :param board: CompactBoard
+        :param cell: (x, y) the goal if reverse, otherwise the start
+        :param reverse: True for costs to cell, False for costs from cell
+        """
+        self.board = board
+        self.cell = board.open_cell(cell)
+        self.reverse = reverse
+        size = board.width * board.height
+        self.distance = array('d', [float('inf')]) * size
+        self.link = array('l', [-1]) * size     # next cell towards / previous cell from self.cell
+        self._search()
+
+    def _search(self):
+        cost, distance, link = self.board.cost, self.distance, self.link
+        width, height = self.board.width, self.board.height
+        settled = bytearray(len(distance))
+        open_nodes = IndexedHeap()
+        distance[self.cell] = 0
+        open_nodes.push(self.cell, 0)
+        while open_nodes:
+            cur = open_nodes.pop()
+            settled[cur] = 1
+            x, y = divmod(cur, width)
+            for other in (cur - width if x > 0 else -1,
+                          cur - 1 if y > 0 else -1,
+                          cur + 1 if y < width - 1 else -1,
+                          cur + width if x < height - 1 else -1):
+                if other == -1 or not cost[other] or settled[other]:
+                    continue
+                # moving into a cell costs that cell's cost, so the edge other -> cur
+                # costs cost[cur] and the edge cur -> other costs cost[other]
+                new_distance = distance[cur] + (cost[cur] if self.reverse else cost[other])
+                if new_distance < distance[other]:
+                    first = distance[other] == float('inf')
+                    distance[other] = new_distance
+                    link[other] = cur
+                    if first:
+                        open_nodes.push(other, new_distance)
+                    else:
+                        open_nodes.decrease_key(other, new_distance)
+
+    def query(self, other):
+        """
+        Path between self.cell and another cell, following the stored links
+        :param other: (x, y) the start if reverse, otherwise the goal
+        :return: path from goal back to start (start excluded) as [x, y] lists and its cost,
+                 or (None, inf) if there is no path or other is a wall
+        """
+        board = self.board
+        x, y = other
+        if 0 <= x < board.height and 0 <= y < board.width and not board.cost[board.cell(x, y)]:
+            return None, float('inf')
+        i = board.open_cell(other)
+        if self.distance[i] == float('inf'):
+            return None, float('inf')
+        width = self.board.width
+        path = []
+        cur = i
+        if self.reverse:
+            while cur != self.cell:
+                cur = self.link[cur]
+                path.append(list(divmod(cur, width)))
+            path.reverse()
+        else:
+            while cur != self.cell:
+                path.append(list(divmod(cur, width)))
+                cur = self.link[cur]
+        return path, self.distance[i]
+
+
+class FieldCache:
+    """
+    Keeps the CostFields of the most recently used (board, cell) pairs, so queries
+    sharing a goal (or a start) reuse one Dijkstra search
+    """
+    def __init__(self, max_fields=16):
+        self.max_fields = max_fields
+        self.fields = OrderedDict()     # (board, cell, reverse) -> CostField
+        self.hits = 0
+        self.misses = 0
+
+    def field(self, board, cell, reverse=True):
+        key = (board, tuple(cell), reverse)
+        if key in self.fields:
+            self.hits += 1
+            self.fields.move_to_end(key)
+            return self.fields[key]
+        self.misses += 1
+        field = CostField(board, cell, reverse)
+        self.fields[key] = field
+        if len(self.fields) > self.max_fields:
+            self.fields.popitem(last=False)
+        return field
+
+    def query(self, board, start, goal):
+        """
+        Path from start to goal using the cached cost-to-goal field of goal
+        :return: path from goal back to start (start excluded) as [x, y] lists and its cost
+        """
+        return self.field(board, goal).query(start)
+
+
+def make_path(cur_node, board, start, goal, mark=True):
+    """
+    Iteratively track down the fastest path
+    :param cur_node:
+    :param board:
+    :param start:
+    :param goal:
+    :param mark: if True, set the char of the nodes on the path to "•" for drawing
+    :return:
+    """
+    path = []
+    while cur_node != board.start:
+        path.append([cur_node.x, cur_node.y])
+        if mark and cur_node is not goal and cur_node is not start:
+            cur_node.char = "•"
+        cur_node = cur_node.parent
+    return path
+
+
+# Step (dx, dy) -> direction code of encode_path(); the first four are the 4-connected moves
+DIRECTIONS = ((-1, 0), (0, -1), (0, 1), (1, 0), (-1, -1), (-1, 1), (1, -1), (1, 1))
+DIRECTION_CODES = dict((step, code) for code, step in enumerate(DIRECTIONS))
+
+
+def _write_varint(out, value):
+    while value > 0x7f:
+        out.append(value & 0x7f | 0x80)
+        value >>= 7
+    out.append(value)
+
+
+def _read_varint(data, i):
+    value, shift = 0, 0
+    while True:
+        if i >= len(data):
+            raise ValueError("truncated path encoding")
+        byte = data[i]
+        i += 1
+        value |= (byte & 0x7f) << shift
+        if byte < 0x80:
+            return value, i
+        shift += 7
+
+
+def encode_path(start, path):
+    """
+    Pack a path into bytes: the start as two varints, then one varint per run of
+    equal steps holding (run length - 1) << 3 | direction code (see DIRECTIONS).
+    A straight stretch of up to 16 cells takes one byte.
+    :param start: (x, y) where the path begins
+    :param path: path from goal back to start (start excluded) as [x, y] lists, as returned by a_star()
+    :return: bytes
+    """
+    out = bytearray()
+    x, y = start
+    _write_varint(out, x)
+    _write_varint(out, y)
+    direction, run = None, 0
+    for nx, ny in reversed(path):
+        code = DIRECTION_CODES.get((nx - x, ny - y))
+        if code is None:
+            raise ValueError("%r does not neighbour %r" % ([nx, ny], [x, y]))
+        if code == direction:
+            run += 1
+        else:
+            if run:
+                _write_varint(out, (run - 1) << 3 | direction)
+            direction, run = code, 1
+        x, y = nx, ny
+    if run:
+        _write_varint(out, (run - 1) << 3 | direction)
+    return bytes(out)
+
+
+def decode_path(data):
+    """
+    Unpack bytes written by encode_path()
+    :param data: bytes
+    :return: start (x, y), and the path from goal back to start (start excluded) as [x, y] lists
+    """
+    x, i = _read_varint(data, 0)
+    y, i = _read_varint(data, i)
+    start = (x, y)
+    path = []
+    while i < len(data):
+        value, i = _read_varint(data, i)
+        dx, dy = DIRECTIONS[value & 7]
+        for _ in range((value >> 3) + 1):
+            x += dx
+            y += dy
+            path.append([x, y])
+    path.reverse()
+    return start, path
+
+
+class PathCache:
+    """
+    Remembers the answers to recent (board, start, goal) queries, least recently used
+    first out once the cached paths take more than max_bytes. Paths are kept packed
+    by encode_path(). Every part of a cheapest path is itself a cheapest path, so a
+    query whose start lies on a cached path to the same goal is answered from that
+    path's tail without searching; an index per (board, goal) maps the cells on cached
+    paths to the entry holding them. Misses are searched with a PathEngine, about 25
+    bytes per board cell; only the max_engines most recently used ones are kept.
+    """
+    INDEX_BYTES = 100       # rough size of one suffix index entry, counted against max_bytes
+    ENTRY_BYTES = 300       # rough size of one entry's key, value tuples and OrderedDict slot
+
+    def __init__(self, max_bytes=1 << 22, max_engines=1):
+        self.max_bytes = max_bytes
+        self.max_engines = max_engines
+        self.size = 0                   # bytes counted against max_bytes
+        self.entries = OrderedDict()    # (board, start, goal) -> (encoded path or None, cost, bytes)
+        self.suffixes = {}              # (board, goal) -> {cell id: key of a cached path through it}
+        self.engines = OrderedDict()    # board -> PathEngine
+        self.hits = 0
+        self.suffix_hits = 0
+        self.misses = 0
+
+    def query(self, board, start, goal):
+        """
+        Cheapest path from start to goal, from the cache or from PathEngine.query()
+        :param board: CompactBoard
+        :param start: (x, y)
+        :param goal: (x, y)
+        :return: path from goal back to start (start excluded) as [x, y] lists and its cost,
+                 or (None, inf) if the goal cannot be reached
+        """
+        start_cell, goal_cell = board.open_cell(start), board.open_cell(goal)
+        start, goal = tuple(start), tuple(goal)
+        key = (board, start, goal)
+        entry = self.entries.get(key)
+        if entry is not None:
+            self.hits += 1
+            self.entries.move_to_end(key)
+            return (None, entry[1]) if entry[0] is None else (decode_path(entry[0])[1], entry[1])
+
+        through = self.suffixes.get((board, goal_cell), {}).get(start_cell)
+        if through is not None:
+            self.suffix_hits += 1
+            self.entries.move_to_end(through)
+            path = decode_path(self.entries[through][0])[1]
+            tail = path[:path.index(list(start))]
+            return tail, sum(board.cost[board.cell(x, y)] for x, y in tail)
+
+        self.misses += 1
+        path, cost = self._engine(board).query(start, goal)
+        self._add(key, path, cost)
+        return path, cost
+
+    def _engine(self, board):
+        engine = self.engines.get(board)
+        if engine is not None:
+            self.engines.move_to_end(board)
+            return engine
+        engine = self.engines[board] = PathEngine(board)
+        if len(self.engines) > self.max_engines:
+            self.engines.popitem(last=False)
+        return engine
+
+    def _add(self, key, path, cost):
+        board, start, goal = key
+        if path is None:
+            data, size = None, self.ENTRY_BYTES
+        else:
+            data = encode_path(start, path)
+            size = self.ENTRY_BYTES + len(data) + self.INDEX_BYTES * len(path)
+        if size > self.max_bytes:
+            return
+        self.entries[key] = (data, cost, size)
+        self.size += size
+        if path:
+            index = self.suffixes.setdefault((board, board.cell(*goal)), {})
+            for x, y in path[1:]:
+                index[board.cell(x, y)] = key
+        while self.size > self.max_bytes:
+            self._evict()
+
+    def _evict(self):
+        (board, start, goal), (data, cost, size) = self.entries.popitem(last=False)
+        self.size -= size
+        if data is None:
+            return
+        goal_key = (board, board.cell(*goal))
+        index = self.suffixes.get(goal_key, {})
+        for x, y in decode_path(data)[1][1:]:
+            cell = board.cell(x, y)
+            if index.get(cell) == (board, start, goal):
+                del index[cell]
+        if not index:
+            self.suffixes.pop(goal_key, None)
+
+    def clear(self):
+        self.entries.clear()
+        self.suffixes.clear()
+        self.engines.clear()
+        self.size = 0
+
+
+
+def draw_path_console(map):
+    """
+    :param map:
+    :return:
+    """
+    final = []
+    string = ""
+    for line in map:
+        row = []
+        for node in line:
+            row.append(node)
+            string += node.char
+        final.append(row)
+        string += "\n"
+    print(string)
+    return final
+
+
+def generate_all_successors(node, possible_nodes, adjacency=None):
+    """
+    :param node:
+    :param possible_nodes:
+    :param adjacency: optional (offsets, targets) from build_adjacency()
+    :return:
+    """
+    if adjacency is None:
+        node.children.extend(neighbours(node, possible_nodes))
+        return
+    offsets, targets = adjacency
+    width = len(possible_nodes[0])
+    i = node.x * width + node.y
+    for j in targets[offsets[i]:offsets[i + 1]]:
+        node.children.append(possible_nodes[j // width][j % width])
+
+
+def neighbours(node, possible_nodes):
+    """
+    Look up the open orthogonal neighbours of a node by indexing the grid directly
+    :param node:
+    :param possible_nodes:
+    :return: list of Node, ordered by row and then by column
+    """
+    x, y = node.x, node.y
+    result = []
+    for i, j in ((x - 1, y), (x, y - 1), (x, y + 1), (x + 1, y)):
+        if 0 <= i < len(possible_nodes) and 0 <= j < len(possible_nodes[i]):
+            n = possible_nodes[i][j]
+            if not n.is_wall:
+                result.append(n)
+    return result
+
+
+
+def attach_and_eval(child, parent, board):
+    """
+    :param child:
+    :param parent:
+    :param board:
+    :return:
+    """
+    child.parent = parent
+    child.g = parent.g + child.cost
+    child.h = abs(board.goal.x - child.x) + abs(board.goal.y - child.y)
+
+
+def propogate_path_improvements(node, open_nodes=None):
+    """
+    Push a lowered g down through the children of an expanded node.
+    Uses a work queue instead of recursion, so it is safe on maps of any size,
+    and a node waiting in the queue is not queued again when it improves twice.
+    :param node:
+    :param open_nodes: IndexedHeap to reorder children that are still open, if any
+    :return:
+    """
+    queue = deque([node])
+    queued = {node}
+    while queue:
+        node = queue.popleft()
+        queued.discard(node)
+        for child in node.children:
+            if node.g + child.cost < child.g:
+                child.parent = node
+                child.g = node.g + child.cost
+                if open_nodes is not None and child.state == OPEN:
+                    open_nodes.decrease_key(child, child.f())
+                if child not in queued:
+                    queued.add(child)
+                    queue.append(child)
+
+
+_worker_engine = None
+_worker_memory = None
+_worker_algorithm = "astar"
+_worker_epsilon = 1.0
+
+
+def _init_batch_worker(memory_name, width, height, board_path, algorithm, epsilon):
+    """
+    Attach a pool worker to the shared cost array and build its PathEngine
+    """
+    from multiprocessing import shared_memory
+    global _worker_engine, _worker_memory, _worker_algorithm, _worker_epsilon
+    _worker_memory = shared_memory.SharedMemory(name=memory_name)
+    board = CompactBoard(_worker_memory.buf[:width * height], width, height, None, None, board_path)
+    _worker_engine = PathEngine(board)
+    _worker_algorithm = algorithm
+    _worker_epsilon = epsilon
+
+
+def _run_batch_query(pair):
+    start, goal = pair
+    try:
+        path, cost = _worker_engine.search(start, goal, _worker_algorithm, _worker_epsilon)
+    except ValueError:      # start or goal is a wall or off the board
+        path, cost = None, float('inf')
+    return start, goal, path, cost
+
+
+def batch_queries(board, queries, workers=None, chunksize=64, algorithm="astar", epsilon=1.0):
+    """
+    Answer (start, goal) queries on one CompactBoard with a pool of worker processes.
+    The cost array is placed in shared memory once and read by every worker.
+    :param board: CompactBoard
+    :param queries: iterable of ((x, y), (x, y)); consumed lazily
+    :param workers: number of processes, defaults to the number of CPUs
+    :param chunksize: queries handed to a worker at a time
+    :param algorithm: one of ALGORITHMS
+    :param epsilon: heuristic inflation for weighted A*
+    :return: generator of (start, goal, path, cost) in the order of the queries;
+             queries with a wall or off-board cell come back as (None, inf)
+    """
+    if algorithm != "astar" and epsilon != 1:
+        raise ValueError("epsilon and heuristic are only supported by the astar algorithm")
+    if algorithm == "jps" and board.uniform_cost is None:
+        raise ValueError("jump point search needs a board where all open cells cost the same")
+    from multiprocessing import Pool, shared_memory
+    size = board.width * board.height
+    memory = shared_memory.SharedMemory(create=True, size=max(size, 1))
+    try:
+        memory.buf[:size] = board.cost
+        initargs = (memory.name, board.width, board.height, board.name, algorithm, epsilon)
+        with Pool(workers, _init_batch_worker, initargs) as pool:
+            for result in pool.imap(_run_batch_query, queries, chunksize):
+                yield result
+    finally:
+        memory.close()
+        memory.unlink()
+
+
+def read_queries(file):
+    """
+    Parse query lines "x1 y1 x2 y2"; blank lines and lines starting with # are skipped
+    :param file: open text file
+    :return: generator of ((x1, y1), (x2, y2))
+    """
+    for line in file:
+        line = line.strip()
+        if line and not line.startswith("#"):
+            x1, y1, x2, y2 = map(int, line.split())
+            yield (x1, y1), (x2, y2)
+
+
+def run_batch(board_path, query_path, output, workers=None, algorithm="astar", epsilon=1.0, path_format="cells"):
+    """
+    Write one line per query: "x1 y1 x2 y2 cost path", where path lists the cells
+    from start to goal as x,y separated by ";", or with path_format "rle" is the
+    encode_path() bytes in URL-safe base64 (cost "inf" and path "-" if unreachable)
+    :param board_path: file.txt
+    :param query_path: file with one "x1 y1 x2 y2" query per line
+    :param output: open text file for the results
+    :param workers: number of processes, defaults to the number of CPUs
+    :param algorithm: one of ALGORITHMS
+    :param epsilon: heuristic inflation for weighted A*
+    :param path_format: "cells" or "rle"
+    :return:
+    """
+    board = make_compact_board(board_path)
+    with open(query_path, "r") as file:
+        for start, goal, path, cost in batch_queries(board, read_queries(file), workers, algorithm=algorithm, epsilon=epsilon):
+            if path is None:
+                cells = "-"
+            elif path_format == "rle":
+                import base64
+                cells = base64.urlsafe_b64encode(encode_path(start, path)).decode("ascii")
+            else:
+                cells = ";".join("%d,%d" % (x, y) for x, y in [start] + path[::-1])
+            output.write("%d %d %d %d %g %s\n" % (start + goal + (cost, cells)))
+
+
+def board_algorithm(board, algorithm, file):
+    """
+    Jump point search only works where every open cell costs the same; fall back to
+    plain A* on the other boards, so a run over all boards does not stop halfway
+    :param board: Board or CompactBoard
+    :param algorithm: one of ALGORITHMS
+    :param file: board file, for the notice
+    :return: the algorithm to run on board
+    """
+    if algorithm == "jps" and board.uniform_cost is None:
+        print("%s: jps needs one cost for every open cell, using astar" % file, file=sys.stderr)
+        return "astar"
+    return algorithm
+
+
+def render_boards(files, directory, image_format="png", scale=20, algorithm="astar", epsilon=1.0,
+                  print_stats=False, movement="grid4"):
+    """
+    Solve each board and write an image of it and its path, without opening any windows
+    :param files: board files
+    :param directory: where the images go, named after the boards
+    :param image_format: "png" or "ppm"
+    :param scale: pixels per cell side
+    :param algorithm: one of ALGORITHMS
+    :param epsilon: heuristic inflation for weighted A*
+    :param print_stats: print the SearchStats of each board as a JSON line
+    :param movement: one of MOVEMENTS
+    :return:
+    """
+    import json
+    from render import save_image
+    os.makedirs(directory, exist_ok=True)
+    for file in files:
+        stats = SearchStats()
+        began = time.perf_counter()
+        board = make_compact_board(file)
+        stats.timings["parse"] = time.perf_counter() - began
+        path, board = a_star(board, algorithm=board_algorithm(board, algorithm, file), epsilon=epsilon,
+                             stats=stats, movement=movement)
+        began = time.perf_counter()
+        image_path = os.path.join(directory, os.path.splitext(os.path.basename(file))[0] + "." + image_format)
+        if path is not None:
+            path = path_cells(board.coords(board.start), path)
+        save_image(board, image_path, path, scale)
+        stats.timings["render"] = time.perf_counter() - began
+        if print_stats:
+            print(json.dumps(dict(stats.as_dict(), board=file, image=image_path), sort_keys=True))
+
+
+def __getattr__(name):
+    # draw_task_1() and draw_task_2() live in gui, which loads tkinter
+    if name in ("draw_task_1", "draw_task_2"):
+        import gui
+        return getattr(gui, name)
+    raise AttributeError("module %r has no attribute %r" % (__name__, name))
+
+
+def main(argv=None):
+    import argparse
+    from glob import glob
+    import json
+    parser = argparse.ArgumentParser(description="A* on the boards in ./boards")
+    parser.add_argument("--batch", nargs=2, metavar=("BOARD", "QUERIES"),
+                        help="answer the start/goal pairs in QUERIES on BOARD instead of drawing the boards")
+    parser.add_argument("--compile", nargs="+", metavar="BOARD",
+                        help="write each BOARD .txt-file as a compiled %s-file next to it" % COMPILED_SUFFIX)
+    parser.add_argument("--algorithm", choices=ALGORITHMS, default="astar", help="search to run")
+    parser.add_argument("--movement", choices=MOVEMENTS, default="grid4",
+                        help="moves allowed: 4-connected, 8-connected or any angle (Theta*)")
+    parser.add_argument("--epsilon", type=float, default=1.0,
+                        help="heuristic inflation for weighted A* (paths cost at most epsilon times the optimum)")
+    parser.add_argument("--workers", type=int, default=None, help="worker processes for --batch")
+    parser.add_argument("--output", default=None, help="file for --batch results (default: stdout)")
+    parser.add_argument("--path-format", choices=("cells", "rle"), default="cells",
+                        help="--batch path output: x,y cells, or base64 run-length direction codes")
+    parser.add_argument("--render", metavar="DIR", default=None,
+                        help="write an image of each board and its path to DIR instead of opening windows")
+    parser.add_argument("--format", choices=("png", "ppm"), default="png", help="image format for --render")
+    parser.add_argument("--scale", type=int, default=20, help="pixels per cell for --render")
+    parser.add_argument("--stats", action="store_true",
+                        help="print the search counters and phase timings of each board as a JSON line")
+    args = parser.parse_args(argv)
+
+    if args.compile:
+        for file in args.compile:
+            save_compiled_board(make_compact_board(file, cache=False),
+                                os.path.splitext(file)[0] + COMPILED_SUFFIX)
+        return
+
+    if args.batch:
+        if args.output:
+            with open(args.output, "w") as output:
+                run_batch(args.batch[0], args.batch[1], output, args.workers, args.algorithm, args.epsilon,
+                          args.path_format)
+        else:
+            run_batch(args.batch[0], args.batch[1], sys.stdout, args.workers, args.algorithm, args.epsilon,
+                      args.path_format)
+        return
+
+    if args.render:
+        render_boards(sorted(glob(r'./boards/*/*.txt')), args.render, args.format, args.scale,
+                      args.algorithm, args.epsilon, args.stats, args.movement)
+        return
+
+    from gui import draw_task_1, draw_task_2
+    files1 = glob(r'./boards/boards1/*.txt')
+    for file in files1:
+        stats = SearchStats()
+        began = time.perf_counter()
+        board, nodes = make_board(file)
+        stats.timings["parse"] = time.perf_counter() - began
+        path, map = a_star(board, algorithm=board_algorithm(board, args.algorithm, file), epsilon=args.epsilon,
+                           stats=stats, movement=args.movement)
+        began = time.perf_counter()
+        final = draw_path_console(map)
+        stats.timings["render"] = time.perf_counter() - began
+        draw_task_1(map, final, stats)
+        if args.stats:
+            # render covers drawing up to the window opening, not the time it stays open
+            print(json.dumps(dict(stats.as_dict(), board=file), sort_keys=True))
+
+    files2 = glob(r'./boards/boards2/*.txt')
+    for file in files2:
+        stats = SearchStats()
+        began = time.perf_counter()
+        board, nodes = make_board(file)
+        stats.timings["parse"] = time.perf_counter() - began
+        path, map = a_star(board, algorithm=board_algorithm(board, args.algorithm, file), epsilon=args.epsilon,
+                           stats=stats, movement=args.movement)
+        began = time.perf_counter()
+        final = draw_path_console(map)
+        stats.timings["render"] = time.perf_counter() - began
+        draw_task_2(map, final, stats)
+        if args.stats:
+            # render covers drawing up to the window opening, not the time it stays open
+            print(json.dumps(dict(stats.as_dict(), board=file), sort_keys=True))
+
+if __name__ == "__main__":
+    main()
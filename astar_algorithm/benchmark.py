@@ -0,0 +1,289 @@
+"""
+Benchmarks for the search engines on generated boards.
+
+Boards are generated from a seed with a given size, share of walls and mix of
+terrain letters, and written in the usual text format so any of the loaders can
+read them. Every engine variant then answers the same seeded start/goal queries
+on each board. Latency and throughput come from a timed pass; memory comes from a
+separate pass under tracemalloc, which would otherwise slow the timed pass down.
+Results are written as JSON, and an earlier results file can be given as a
+baseline to catch regressions.
+
+    python benchmark.py --sizes 128 512 --densities 0.1 0.3 --output results.json
+    python benchmark.py --baseline results.json
+"""
+import argparse
+import json
+import os
+import platform
+import random
+import sys
+import time
+import tracemalloc
+
+from a_star import PathEngine, SearchStats, make_compact_board
+from hierarchical import Abstraction
+from landmarks import Landmarks
+
+# Relative weights of the letters used for open cells
+TERRAINS = {
+    "uniform": {".": 1},
+    "terrain": {"r": 4, "g": 3, "f": 2, "m": 1, "w": 1},
+}
+
+
+def generate_board(width, height, density=0.2, terrain="terrain", seed=0):
+    """
+    Generate a random board; A and B are placed on two open cells
+    :param width: cells per row
+    :param height: number of rows
+    :param density: share of cells that are walls
+    :param terrain: key of TERRAINS, or a dict of letter -> weight
+    :param seed: random seed
+    :return: list of rows as strings
+    """
+    weights = TERRAINS[terrain] if isinstance(terrain, str) else terrain
+    letters, counts = zip(*sorted(weights.items()))
+    rng = random.Random(seed)
+    rows = []
+    for _ in range(height):
+        cells = rng.choices(letters, counts, k=width)
+        for j in range(width):
+            if rng.random() < density:
+                cells[j] = "#"
+        rows.append(cells)
+    open_cells = [(x, y) for x in range(height) for y in range(width) if rows[x][y] != "#"]
+    if len(open_cells) < 2:
+        raise ValueError("density %r leaves fewer than two open cells" % (density,))
+    (ax, ay), (bx, by) = rng.sample(open_cells, 2)
+    rows[ax][ay], rows[bx][by] = "A", "B"
+    return ["".join(row) for row in rows]
+
+
+def write_board(path, rows):
+    """
+    :param path: file name
+    :param rows: list of rows as strings
+    :return:
+    """
+    with open(path, "w") as file:
+        file.write("\n".join(rows) + "\n")
+
+
+def random_queries(board, count, seed=0):
+    """
+    Pick start/goal pairs among the open cells; the board's own A to B comes first
+    :param board: CompactBoard
+    :param count: number of queries
+    :param seed: random seed
+    :return: list of ((x, y), (x, y))
+    """
+    rng = random.Random(seed)
+    open_cells = [i for i in range(len(board.cost)) if board.cost[i]]
+    queries = [(board.coords(board.start), board.coords(board.goal))]
+    while len(queries) < count:
+        a, b = rng.sample(open_cells, 2)
+        queries.append((board.coords(a), board.coords(b)))
+    return queries[:count]
+
+
+def _engine_variant(algorithm="astar", epsilon=1.0):
+    def setup(board):
+        engine = PathEngine(board)
+
+        def run(start, goal):
+            stats = SearchStats()
+            path, cost = engine.search(start, goal, algorithm, epsilon, stats=stats)
+            return cost, stats.expansions
+        return run
+    return setup
+
+
+def _alt_variant(board):
+    engine = PathEngine(board)
+    heuristic = Landmarks(board).heuristic
+
+    def run(start, goal):
+        path, cost = engine.query(start, goal, heuristic=heuristic)
+        return cost, engine.expansions
+    return run
+
+
+def _hpa_variant(board):
+    abstraction = Abstraction(board)
+
+    def run(start, goal):
+        path, cost = abstraction.query(start, goal)
+        return cost, None
+    return run
+
+
+# Variant name -> setup(board) returning run(start, goal) -> (cost, expansions or None).
+# Setup covers any per-board preprocessing and is timed separately.
+VARIANTS = {
+    "astar": _engine_variant(),
+    "weighted": _engine_variant(epsilon=1.5),
+    "bidirectional": _engine_variant("bidirectional"),
+    "jps": _engine_variant("jps"),
+    "alt": _alt_variant,
+    "hpa": _hpa_variant,
+}
+
+
+def _percentile(values, fraction):
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(fraction * len(ordered)))]
+
+
+def run_variant(name, board, queries, memory_queries=5):
+    """
+    Benchmark one variant on one board
+    :param name: key of VARIANTS
+    :param board: CompactBoard
+    :param queries: list of ((x, y), (x, y))
+    :param memory_queries: queries run under tracemalloc for the memory figures
+    :return: dict of results, or None if the variant does not support the board
+    """
+    if name == "jps" and board.uniform_cost is None:
+        return None
+    began = time.perf_counter()
+    run = VARIANTS[name](board)
+    setup = time.perf_counter() - began
+
+    latencies, costs, expansions = [], [], []
+    for start, goal in queries:
+        began = time.perf_counter()
+        cost, expanded = run(start, goal)
+        latencies.append(time.perf_counter() - began)
+        costs.append(cost)
+        expansions.append(expanded)
+
+    tracemalloc.start()
+    try:
+        run = VARIANTS[name](board)
+        setup_peak = tracemalloc.get_traced_memory()[1]
+        tracemalloc.reset_peak()
+        for start, goal in queries[:memory_queries]:
+            run(start, goal)
+        query_peak = tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+
+    found = [c for c in costs if c != float('inf')]
+    return {
+        "variant": name,
+        "queries": len(queries),
+        "found": len(found),
+        "total_cost": sum(found),
+        "expansions": None if None in expansions else sum(expansions),
+        "setup_s": setup,
+        "throughput_qps": len(latencies) / sum(latencies),
+        "latency_ms": {
+            "mean": 1000 * sum(latencies) / len(latencies),
+            "p50": 1000 * _percentile(latencies, 0.5),
+            "p95": 1000 * _percentile(latencies, 0.95),
+            "max": 1000 * max(latencies),
+        },
+        "setup_peak_bytes": setup_peak,
+        "query_peak_bytes": query_peak,
+    }
+
+
+def run_benchmarks(sizes, densities, terrains, variants, queries=20, seed=0, maps_dir=".benchmaps",
+                   memory_queries=5, log=None):
+    """
+    Generate one board per size, density and terrain and run every variant on it
+    :param sizes: board side lengths
+    :param densities: wall shares
+    :param terrains: keys of TERRAINS
+    :param variants: keys of VARIANTS
+    :param queries: queries per board
+    :param seed: random seed for boards and queries
+    :param maps_dir: directory the generated boards are written to
+    :param memory_queries: queries run under tracemalloc per variant
+    :param log: open text file for progress lines, or None
+    :return: results dict, ready for json.dump()
+    """
+    os.makedirs(maps_dir, exist_ok=True)
+    results = []
+    for size in sizes:
+        for density in densities:
+            for terrain in terrains:
+                map_path = os.path.join(maps_dir, "%s-%d-%g-%d.txt" % (terrain, size, density, seed))
+                write_board(map_path, generate_board(size, size, density, terrain, seed))
+                began = time.perf_counter()
+                board = make_compact_board(map_path, cache=False)
+                parse = time.perf_counter() - began
+                pairs = random_queries(board, queries, seed)
+                for name in variants:
+                    result = run_variant(name, board, pairs, memory_queries)
+                    if result is None:
+                        continue
+                    result.update(board=map_path, size=size, density=density, terrain=terrain, parse_s=parse)
+                    results.append(result)
+                    if log is not None:
+                        log.write("%-40s %-14s %9.1f q/s  p50 %8.2f ms  peak %7.1f KiB\n" % (
+                            os.path.basename(map_path), name, result["throughput_qps"],
+                            result["latency_ms"]["p50"], result["query_peak_bytes"] / 1024))
+    return {
+        "python": sys.version.split()[0],
+        "platform": platform.platform(),
+        "created": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "seed": seed,
+        "results": results,
+    }
+
+
+def compare(results, baseline, tolerance=0.2):
+    """
+    Find runs whose median latency grew by more than tolerance since a baseline
+    :param results: dict from run_benchmarks()
+    :param baseline: dict from an earlier run_benchmarks()
+    :param tolerance: allowed relative slowdown
+    :return: list of (board, variant, old p50 ms, new p50 ms)
+    """
+    old = dict(((r["board"], r["variant"]), r) for r in baseline["results"])
+    slower = []
+    for result in results["results"]:
+        before = old.get((result["board"], result["variant"]))
+        if before is None:
+            continue
+        was, now = before["latency_ms"]["p50"], result["latency_ms"]["p50"]
+        if now > was * (1 + tolerance):
+            slower.append((result["board"], result["variant"], was, now))
+    return slower
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark the search engines on generated boards")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[64, 128], help="board side lengths")
+    parser.add_argument("--densities", type=float, nargs="+", default=[0.1, 0.3], help="shares of wall cells")
+    parser.add_argument("--terrains", nargs="+", choices=sorted(TERRAINS), default=sorted(TERRAINS),
+                        help="terrain letter mixes")
+    parser.add_argument("--variants", nargs="+", choices=list(VARIANTS), default=list(VARIANTS),
+                        help="engine variants to run")
+    parser.add_argument("--queries", type=int, default=20, help="queries per board")
+    parser.add_argument("--memory-queries", type=int, default=5, help="queries per variant run under tracemalloc")
+    parser.add_argument("--seed", type=int, default=0, help="random seed for boards and queries")
+    parser.add_argument("--maps-dir", default=".benchmaps", help="directory for the generated boards")
+    parser.add_argument("--output", default="benchmark.json", help="results file")
+    parser.add_argument("--baseline", default=None, help="earlier results file to compare against")
+    parser.add_argument("--tolerance", type=float, default=0.2, help="allowed relative slowdown against --baseline")
+    args = parser.parse_args(argv)
+
+    results = run_benchmarks(args.sizes, args.densities, args.terrains, args.variants, args.queries,
+                             args.seed, args.maps_dir, args.memory_queries, log=sys.stdout)
+    with open(args.output, "w") as file:
+        json.dump(results, file, indent=1)
+
+    if args.baseline:
+        with open(args.baseline, "r") as file:
+            slower = compare(results, json.load(file), args.tolerance)
+        for board, variant, was, now in slower:
+            print("slower: %s %s p50 %.2f ms -> %.2f ms" % (board, variant, was, now))
+        if slower:
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
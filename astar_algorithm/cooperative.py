@@ -0,0 +1,409 @@
+"""
+Cooperative pathfinding for many agents on one CompactBoard.
+
+Agents are planned one after the other in priority order. Each plan is a
+space-time A* search over (cell, timestep) states, where an agent may move to a
+neighbouring cell or wait where it is. Each planned path is entered into a
+shared reservation table, and later agents plan around it. Two agents never
+share a cell at the same timestep, and never swap cells along the same edge.
+Every step, waiting included, costs the cost of the cell the agent is in
+afterwards. The heuristic is the true cost to the goal ignoring other agents,
+taken from a CostField. A search gives up at once when its goal is taken for
+good or walled off by parked agents. Otherwise it gives up once it has run
+well past the time its own cheapest path would take after everyone planned
+before it has stopped.
+
+With a window the search looks only that many steps ahead (windowed hierarchical
+cooperative A*). Past the window, the CostField distance stands in for the rest
+of the path. The agents then follow their plans for replan_every steps, and
+everyone plans again from where they are.
+
+    python cooperative.py boards/boards2/board-2-3.txt --agents 5 10 20 --window 16
+"""
+import argparse
+import random
+import time
+
+from a_star import FieldCache, IndexedHeap, PathEngine, make_compact_board
+
+INF = float('inf')
+
+
+class ReservationTable:
+    """
+    Cells and moves taken by the agents planned so far
+    """
+    def __init__(self):
+        self.cells = set()      # (cell, t)
+        self.edges = set()      # (from cell, to cell, t): a move made between t and t + 1
+        self.last = {}          # cell -> last timestep it is reserved at
+        self.parked = {}        # cell -> timestep an agent stops there for good
+        self.latest = 0         # last timestep any agent moves at; nothing changes after it
+
+    def reserve(self, cells, start_time, park=False):
+        """
+        :param cells: linear cell ids the agent is in at start_time, start_time + 1, ...
+        :param start_time: timestep of the first cell
+        :param park: if True, the agent stays in the last cell forever
+        :return:
+        """
+        t = start_time
+        for i, cell in enumerate(cells):
+            t = start_time + i
+            self.cells.add((cell, t))
+            if t > self.last.get(cell, -1):
+                self.last[cell] = t
+            if i:
+                self.edges.add((cells[i - 1], cell, t - 1))
+        if t > self.latest:
+            self.latest = t
+        if park:
+            self.parked[cells[-1]] = t
+
+    def is_free(self, cell, t):
+        parked = self.parked.get(cell)
+        return (cell, t) not in self.cells and (parked is None or t < parked)
+
+    def can_move(self, cell, other, t):
+        """
+        Whether an agent in cell at t can be in other at t + 1 (other == cell to wait)
+        """
+        return self.is_free(other, t + 1) and (other, cell, t) not in self.edges
+
+    def free_from(self, cell, t, until=None):
+        """
+        Whether cell is free at every timestep from t to until (forever if None)
+        """
+        if cell in self.parked:
+            return False
+        if until is None:
+            return self.last.get(cell, -1) < t
+        return all((cell, step) not in self.cells for step in range(t, until + 1))
+
+
+class CooperativePlanner:
+    """
+    Plans collision-free paths for several agents on one CompactBoard
+    """
+    def __init__(self, board, window=None, replan_every=None, max_steps=None, fields=None, slack=16):
+        """
+        :param board: CompactBoard
+        :param window: timesteps each search looks ahead, or None to plan every path to the goal at once
+        :param replan_every: timesteps the agents move between plans with a window, defaults to window // 2
+        :param max_steps: timesteps after which agents that have not arrived give up,
+                          defaults to twice the number of cells
+        :param fields: FieldCache for the heuristic, shared across planners on the same board
+        :param slack: without a window, a search gives up this many timesteps past twice the
+                      steps of the agent's own cheapest path, counted from when the agents
+                      planned before it have all stopped
+        """
+        if window is not None and window < 1:
+            raise ValueError("window must be at least 1, not %r" % (window,))
+        self.board = board
+        self.window = window
+        self.replan_every = replan_every or max(1, (window or 2) // 2)
+        self.max_steps = max_steps or 2 * board.width * board.height
+        self.fields = fields or FieldCache()
+        self.slack = slack
+        self.expansions = 0         # space-time states expanded by the last plan()
+        self.moves = []             # per agent, its cells for every timestep of the last plan(), arrived or not
+
+    def _neighbours(self, cell):
+        width, height = self.board.width, self.board.height
+        x, y = divmod(cell, width)
+        return (cell,
+                cell - width if x > 0 else -1,
+                cell - 1 if y > 0 else -1,
+                cell + 1 if y < width - 1 else -1,
+                cell + width if x < height - 1 else -1)
+
+    def _reachable(self, start, goal, blocked):
+        seen = set(blocked)
+        seen.add(start)
+        stack = [start]
+        cost = self.board.cost
+        while stack:
+            cell = stack.pop()
+            if cell == goal:
+                return True
+            for other in self._neighbours(cell)[1:]:
+                if other != -1 and cost[other] and other not in seen:
+                    seen.add(other)
+                    stack.append(other)
+        return False
+
+    def _search(self, start, goal, t0, table, field):
+        """
+        Space-time A* from start at timestep t0
+        :return: cells for timesteps t0, t0 + 1, ..., and whether the last one is the goal,
+                 or (None, False) if nothing was found
+        """
+        cost, distance = self.board.cost, field.distance
+        if distance[start] == INF:
+            return None, False
+        end = t0 + self.window if self.window is not None else None
+        if end is None:
+            # the goal is taken for good, or walled off by agents parked for good
+            if goal in table.parked:
+                return None, False
+            parked = set(cell for cell, t in table.parked.items() if t <= t0)
+            if parked and not self._reachable(start, goal, parked):
+                return None, False
+            steps, cell = 0, start
+            while cell != goal:
+                cell = field.link[cell]
+                steps += 1
+            horizon = t0 + min(self.max_steps, max(table.latest - t0, 0) + 2 * steps + self.slack)
+        else:
+            horizon = end
+        g = {(start, t0): 0}
+        parent = {}
+        closed = set()
+        open_nodes = IndexedHeap()
+        open_nodes.push((start, t0), distance[start])
+        while open_nodes:
+            state = open_nodes.pop()
+            closed.add(state)
+            cell, t = state
+            self.expansions += 1
+            arrived = cell == goal and table.free_from(goal, t, end)
+            if arrived or t == end:
+                cells = [cell]
+                while state in parent:
+                    state = parent[state]
+                    cells.append(state[0])
+                return cells[::-1], arrived
+            if t >= horizon:
+                continue
+            for other in self._neighbours(cell):
+                if other == -1 or not cost[other] or distance[other] == INF:
+                    continue
+                if not table.can_move(cell, other, t):
+                    continue
+                nxt = (other, t + 1)
+                if nxt in closed:
+                    continue
+                new_g = g[state] + cost[other]
+                if new_g < g.get(nxt, INF):
+                    f = new_g + distance[other]
+                    if nxt in g:
+                        open_nodes.decrease_key(nxt, f)
+                    else:
+                        open_nodes.push(nxt, f)
+                    g[nxt] = new_g
+                    parent[nxt] = state
+        return None, False
+
+    def plan(self, agents):
+        """
+        :param agents: list of ((x, y) start, (x, y) goal), highest priority first
+        :return: per agent, its cells as [x, y] lists for timesteps 0, 1, ... up to its
+                 arrival, or None if it could not reach its goal within max_steps. Where
+                 the agents that did not arrive went is left in self.moves.
+        """
+        board = self.board
+        starts = [board.open_cell(start) for start, goal in agents]
+        goals = [board.open_cell(goal) for start, goal in agents]
+        fields = [self.fields.field(board, board.coords(goal)) for goal in goals]
+        self.expansions = 0
+        if self.window is None:
+            moves, arrived = self._plan_full(starts, goals, fields)
+        else:
+            moves, arrived = self._plan_windowed(starts, goals, fields)
+        self.moves = [[list(board.coords(cell)) for cell in track] for track in moves]
+        return [track if done else None for track, done in zip(self.moves, arrived)]
+
+    def _plan_full(self, starts, goals, fields):
+        # An agent that cannot reach its goal stays at its start for good. Agents planned
+        # before it may have driven through that cell, so planning starts over with the
+        # stranded agents parked from timestep 0, until no new agent gets stranded.
+        stranded = set()
+        while True:
+            table = ReservationTable()
+            for i in stranded:
+                table.reserve([starts[i]], 0, park=True)
+            tracks = []
+            for i, (start, goal, field) in enumerate(zip(starts, goals, fields)):
+                if i in stranded:
+                    tracks.append([start])
+                    continue
+                cells, arrived = self._search(start, goal, 0, table, field)
+                if not arrived:
+                    stranded.add(i)
+                    break
+                table.reserve(cells, 0, park=True)
+                tracks.append(cells)
+            else:
+                return tracks, [i not in stranded for i in range(len(starts))]
+
+    def _plan_windowed(self, starts, goals, fields):
+        positions = list(starts)
+        tracks = [[start] for start in starts]
+        arrived_at = [0 if start == goal else None for start, goal in zip(starts, goals)]
+        now = 0
+        while now < self.max_steps and None in arrived_at:
+            # as in _plan_full(), an agent with no way through the window holds its cell,
+            # and the window is planned again with it held from the start
+            held = set()
+            plans = None
+            while plans is None:
+                table = ReservationTable()
+                for i in held:
+                    table.reserve([positions[i]] * (self.window + 1), now)
+                plans = []
+                for i, (cell, goal, field) in enumerate(zip(positions, goals, fields)):
+                    if i in held:
+                        plans.append([cell] * (self.window + 1))
+                        continue
+                    cells, arrived = self._search(cell, goal, now, table, field)
+                    if cells is None:
+                        held.add(i)
+                        plans = None
+                        break
+                    if arrived:
+                        # hold the goal to the end of the window
+                        cells = cells + [goal] * (self.window + 1 - len(cells))
+                    table.reserve(cells, now)
+                    plans.append(cells)
+            steps = min(self.replan_every, self.max_steps - now)
+            for i, cells in enumerate(plans):
+                for step in range(1, steps + 1):
+                    positions[i] = cells[min(step, len(cells) - 1)]
+                    tracks[i].append(positions[i])
+                    if positions[i] != goals[i]:
+                        arrived_at[i] = None
+                    elif arrived_at[i] is None:
+                        arrived_at[i] = now + step
+            now += steps
+        return ([track if arrived is None else track[:arrived + 1] for track, arrived in zip(tracks, arrived_at)],
+                [arrived is not None for arrived in arrived_at])
+
+
+def track_cost(board, track):
+    """
+    :param board: CompactBoard
+    :param track: cells as [x, y] lists per timestep
+    :return: cost of every step after the first, waits included
+    """
+    return sum(board.cost[board.cell(x, y)] for x, y in track[1:])
+
+
+def count_conflicts(tracks, starts=None):
+    """
+    Count the times two agents share a cell or swap cells; agents stay at their last cell
+    :param tracks: per agent, cells per timestep, or None for an agent that stays at its start
+    :param starts: per agent, its start; needed if any track is None
+    :return: number of conflicts
+    """
+    tracks = [[tuple(c) for c in (track if track is not None else [starts[i]])] for i, track in enumerate(tracks)]
+    length = max([len(track) for track in tracks] or [0])
+    at = lambda track, t: track[min(t, len(track) - 1)]
+    conflicts = 0
+    for t in range(length):
+        cells = [at(track, t) for track in tracks]
+        conflicts += len(cells) - len(set(cells))
+        if t:
+            moves = set((at(track, t - 1), at(track, t)) for track in tracks)
+            conflicts += sum(1 for a, b in moves if a < b and (b, a) in moves)
+    return conflicts
+
+
+def random_agents(board, count, seed=0):
+    """
+    Pick distinct starts and distinct goals, each goal reachable from its start
+    :return: list of ((x, y), (x, y))
+    """
+    rng = random.Random(seed)
+    open_cells = [i for i in range(len(board.cost)) if board.cost[i]]
+    if 2 * count > len(open_cells):
+        raise ValueError("%d agents do not fit on %d open cells" % (count, len(open_cells)))
+    # label connected areas so every goal can be reached from its start
+    area = {}
+    for first in open_cells:
+        if first in area:
+            continue
+        area[first] = first
+        stack = [first]
+        while stack:
+            cell = stack.pop()
+            for other in (cell - board.width if cell >= board.width else -1,
+                          cell - 1 if cell % board.width else -1,
+                          cell + 1 if (cell + 1) % board.width else -1,
+                          cell + board.width if cell + board.width < len(board.cost) else -1):
+                if other != -1 and board.cost[other] and other not in area:
+                    area[other] = first
+                    stack.append(other)
+    agents = []
+    taken = set()
+    for start in rng.sample(open_cells, len(open_cells)):
+        goals = [cell for cell in open_cells if area[cell] == area[start] and cell != start and cell not in taken]
+        if start in taken or not goals:
+            continue
+        goal = rng.choice(goals)
+        taken.update((start, goal))
+        agents.append((board.coords(start), board.coords(goal)))
+        if len(agents) == count:
+            return agents
+    raise ValueError("could not place %d agents" % count)
+
+
+def planning_report(board, counts, window=None, replan_every=None, seed=0):
+    """
+    Plan random agents in groups of each size, with the cooperative planner and with
+    independent A* searches for comparison
+    :param board: CompactBoard
+    :param counts: agent counts
+    :param window: see CooperativePlanner
+    :param replan_every: see CooperativePlanner
+    :param seed: random seed
+    :return: list of dicts, one per count
+    """
+    rows = []
+    fields = FieldCache(max_fields=max(counts))
+    for count in counts:
+        agents = random_agents(board, count, seed)
+        began = time.perf_counter()
+        engine = PathEngine(board)
+        independent = []
+        for start, goal in agents:
+            path, cost = engine.query(start, goal)
+            independent.append([list(start)] + path[::-1])
+        independent_time = time.perf_counter() - began
+
+        planner = CooperativePlanner(board, window, replan_every, fields=fields)
+        began = time.perf_counter()
+        tracks = planner.plan(agents)
+        seconds = time.perf_counter() - began
+        done = [track for track in tracks if track is not None]
+        rows.append({
+            "agents": count,
+            "seconds": seconds,
+            "arrived": len(done),
+            "sum_of_costs": sum(track_cost(board, track) for track in done),
+            "makespan": max([len(track) - 1 for track in done] or [0]),
+            "conflicts": count_conflicts(planner.moves),
+            "expansions": planner.expansions,
+            "independent_seconds": independent_time,
+            "independent_conflicts": count_conflicts(independent),
+        })
+    return rows
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Cooperative A* planning time for growing numbers of agents")
+    parser.add_argument("board", help="board file")
+    parser.add_argument("--agents", type=int, nargs="+", default=[5, 10, 20], help="agent counts")
+    parser.add_argument("--window", type=int, default=None, help="timesteps to look ahead (default: plan to the goal)")
+    parser.add_argument("--replan-every", type=int, default=None, help="timesteps between plans with --window")
+    parser.add_argument("--seed", type=int, default=0, help="random seed for starts and goals")
+    args = parser.parse_args(argv)
+    board = make_compact_board(args.board)
+    for row in planning_report(board, args.agents, args.window, args.replan_every, args.seed):
+        print("%3d agents  %8.3f s  arrived %3d  cost %6g  makespan %4d  conflicts %d"
+              "  (independent A*: %.3f s, %d conflicts)" % (
+                  row["agents"], row["seconds"], row["arrived"], row["sum_of_costs"], row["makespan"],
+                  row["conflicts"], row["independent_seconds"], row["independent_conflicts"]))
+
+
+if __name__ == "__main__":
+    main()
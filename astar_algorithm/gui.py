@@ -0,0 +1,108 @@
+"""
+Tk drawings of solved boards. Imported by a_star only when a window is opened,
+so the search code can be used without loading tkinter.
+"""
+import sys
+import time
+if sys.version_info[0] == 3:
+    # for Python3
+    from tkinter import *   # notice lowercase 't' in tkinter here
+else:
+    # for Python2
+    from Tkinter import *   # notice capitalized T in Tkinter
+
+
+def draw_task_1(map, grid, stats=None):
+    """
+    Using tkinter to visually plot the maze
+    :param map:
+    :param grid:
+    :param stats: SearchStats to add the drawing time (before the window opens) to
+    :return:
+    """
+    began = time.perf_counter()
+    master = Tk()
+    w = Canvas(master, width=600, height=210)
+    w.pack()
+
+    # Creating the grid
+    for i in range(0, 601, 30):
+        w.create_line(i, 0, i, 210, fill="black")
+    for i in range(0, 211, 30):
+        w.create_line(0, i, 600, i, fill="black")
+
+    # Drawing the initial canvas, then running the algorithm, and filling it in
+    for j in range(len(map)):
+        for i in range(len(map[0])):
+            if map[j][i].char == "#":
+                w.create_rectangle(i * 30, j * 30, (i + 1) * 30, (j + 1) * 30, fill="grey")
+            elif map[j][i].char == ".":
+                w.create_rectangle(i * 30, j * 30, (i + 1) * 30, (j + 1) * 30, fill="white")
+            elif map[j][i].char == "A":
+                w.create_rectangle(i * 30, j * 30, (i + 1) * 30, (j + 1) * 30, fill="red")
+                w.create_text(i * 30 + 15, j * 30 + 15, font="Times 20", text="A")
+            elif map[j][i].char == "B":
+                w.create_rectangle(i * 30, j * 30, (i + 1) * 30, (j + 1) * 30, fill="light green")
+                w.create_text(i * 30 + 15, j * 30 + 15, font="Times 20", text="B")
+    for j in range(len(grid)):
+            for i in range(len(grid[0])):
+                if grid[j][i].char == "•":
+                    w.create_rectangle(i * 30, j * 30, (i + 1) * 30, (j + 1) * 30, fill="black")
+                    w.create_text(i * 30 + 15, j * 30 + 15, font="Times 20", text="•", fill="white")
+                elif grid[j][i].char == "x":
+                    w.create_text(i * 30 + 15, j * 30 + 15, font="Times 20", text="x")
+                elif grid[j][i].char == "*":
+                    w.create_text(i * 30 + 15, j * 30 + 15, font="Times 20", text="*")
+    if stats is not None:
+        stats.timings["render"] += time.perf_counter() - began
+    mainloop()
+
+
+def draw_task_2(map, grid, stats=None):
+    """
+    Using tkinter to visually plot the maze
+    :param map:
+    :param grid:
+    :param stats: SearchStats to add the drawing time (before the window opens) to
+    :return:
+    """
+    began = time.perf_counter()
+    master = Tk()
+    w = Canvas(master, width=800, height=200)
+    w.pack()
+
+    # Creating the grid
+    for i in range(0, 801, 20):
+        w.create_line(i, 0, i, 200, fill="black")
+    for i in range(0, 201, 20):
+        w.create_line(0, i, 800, i, fill="black")
+    # Drawing the initial canvas, then running the algorithm, and filling it in
+    for j in range(len(map)):
+        for i in range(len(map[0])):
+            if map[j][i].char == "w":
+                w.create_rectangle(i * 20, j * 20, (i + 1) * 20, (j + 1) * 20, fill="blue")
+            elif map[j][i].char == "r":
+                w.create_rectangle(i * 20, j * 20, (i + 1) * 20, (j + 1) * 20, fill="chocolate")
+            elif map[j][i].char == "f":
+                w.create_rectangle(i * 20, j * 20, (i + 1) * 20, (j + 1) * 20, fill="dark green")
+            elif map[j][i].char == "g":
+                w.create_rectangle(i * 20, j * 20, (i + 1) * 20, (j + 1) * 20, fill="light green")
+            elif map[j][i].char == "m":
+                w.create_rectangle(i * 20, j * 20, (i + 1) * 20, (j + 1) * 20, fill="grey")
+            elif map[j][i].char == "A":
+                w.create_rectangle(i * 20, j * 20, (i + 1) * 20, (j + 1) * 20, fill="red")
+                w.create_text(i * 20+ 10, j * 20 + 10, font="Times 20", text="A")
+            elif map[j][i].char == "B":
+                w.create_rectangle(i * 20, j * 20, (i + 1) * 20, (j + 1) * 20, fill="yellow")
+                w.create_text(i * 20 + 10, j * 20 + 10, font="Times 20", text="B")
+    for j in range(len(grid)):
+            for i in range(len(grid[0])):
+                if grid[j][i].char == "•":
+                    w.create_rectangle(i * 20, j * 20, (i + 1) * 20, (j + 1) * 20, fill="black")
+                    w.create_text(i * 20 + 10, j * 20 + 10, font="Times 20", text="•", fill="white")
+                elif grid[j][i].char == "x":
+                    w.create_text(i * 20 + 10, j * 20 + 10, font="Times 20", text="x")
+                    w.create_text(i * 20 + 10, j * 20 + 10, font="Times 20", text="*")
+    if stats is not None:
+        stats.timings["render"] += time.perf_counter() - began
+    mainloop()
@@ -0,0 +1,263 @@
+"""
+Hierarchical pathfinding (HPA*) on a CompactBoard.
+
+The board is cut into square clusters. Cells on either side of a cluster border
+that are both open form entrances, and transition cells are placed along them.
+The abstract graph links transitions across borders (one step) and inside each
+cluster (cheapest path that stays in the cluster). A query searches the small
+abstract graph and then refines each abstract edge into cells.
+"""
+import json
+import zlib
+
+from a_star import IndexedHeap
+
+
+def cluster_search(board, source, bounds, reverse=False, target=-1):
+    """
+    Dijkstra from source over the cells inside bounds
+    :param board: CompactBoard
+    :param source: linear cell id
+    :param bounds: (x0, x1, y0, y1), half-open
+    :param reverse: if True, distances are costs from each cell to source instead of from source
+    :param target: stop once this cell is settled
+    :return: dicts distance and link (previous cell from source, or next cell towards it)
+    """
+    cost, width = board.cost, board.width
+    x0, x1, y0, y1 = bounds
+    distance = {source: 0}
+    link = {}
+    settled = set()
+    open_nodes = IndexedHeap()
+    open_nodes.push(source, 0)
+    while open_nodes:
+        cur = open_nodes.pop()
+        settled.add(cur)
+        if cur == target:
+            break
+        x, y = divmod(cur, width)
+        for nx, ny in ((x - 1, y), (x, y - 1), (x, y + 1), (x + 1, y)):
+            if not (x0 <= nx < x1 and y0 <= ny < y1):
+                continue
+            other = nx * width + ny
+            if not cost[other] or other in settled:
+                continue
+            new_distance = distance[cur] + (cost[cur] if reverse else cost[other])
+            if new_distance < distance.get(other, float('inf')):
+                if other in distance:
+                    open_nodes.decrease_key(other, new_distance)
+                else:
+                    open_nodes.push(other, new_distance)
+                distance[other] = new_distance
+                link[other] = cur
+    return distance, link
+
+
+class Abstraction:
+    """
+    Cluster abstraction of one CompactBoard. Build it once per map (or load it with
+    Abstraction.load()), then answer any number of queries with query().
+
+    entrance_width trades optimality for speed: an entrance of that many cells or
+    fewer gets a single transition in its middle, and longer entrances get one every
+    entrance_width cells plus one at each end. With entrance_width=1 every border
+    cell is a transition and paths are optimal; larger values give a smaller
+    abstract graph and faster queries, at the price of detours through the chosen
+    transitions. cluster_size has a similar effect.
+    """
+    def __init__(self, board, cluster_size=10, entrance_width=6, build=True):
+        self.board = board
+        self.cluster_size = cluster_size
+        self.entrance_width = entrance_width
+        self.edges = {}     # transition cell -> {neighbour transition cell: cost}
+        self.clusters = {}  # cluster bounds -> transition cells in it
+        if build:
+            self._build()
+
+    def cluster_bounds(self, cell):
+        """
+        :param cell: linear cell id
+        :return: (x0, x1, y0, y1) of the cluster holding cell
+        """
+        x, y = divmod(cell, self.board.width)
+        k = self.cluster_size
+        x0, y0 = x - x % k, y - y % k
+        return x0, min(x0 + k, self.board.height), y0, min(y0 + k, self.board.width)
+
+    def _build(self):
+        board, k = self.board, self.cluster_size
+        width = board.width
+        for i in range(0, board.height, k):
+            for j in range(k, width, k):
+                # border between columns j - 1 and j, along one cluster
+                self._add_entrances([(x * width + j - 1, x * width + j)
+                                     for x in range(i, min(i + k, board.height))])
+        for i in range(k, board.height, k):
+            for j in range(0, width, k):
+                self._add_entrances([((i - 1) * width + y, i * width + y)
+                                     for y in range(j, min(j + k, width))])
+
+        self._index_clusters()
+        for bounds, cells in self.clusters.items():
+            for cell in cells:
+                distance, link = cluster_search(board, cell, bounds)
+                for other in cells:
+                    if other != cell and other in distance:
+                        self.edges[cell][other] = distance[other]
+
+    def _index_clusters(self):
+        self.clusters = {}
+        for cell in self.edges:
+            self.clusters.setdefault(self.cluster_bounds(cell), []).append(cell)
+
+    def _add_entrances(self, pairs):
+        """
+        Place transitions along one cluster border
+        :param pairs: list of (cell, cell across the border)
+        """
+        cost = self.board.cost
+        segment = []
+        for a, b in pairs + [(None, None)]:
+            if a is not None and cost[a] and cost[b]:
+                segment.append((a, b))
+                continue
+            if segment:
+                n, w = len(segment), self.entrance_width
+                if n <= w:
+                    chosen = [n // 2]
+                else:
+                    chosen = sorted(set(list(range(0, n, w)) + [n - 1]))
+                for i in chosen:
+                    a_cell, b_cell = segment[i]
+                    self.edges.setdefault(a_cell, {})[b_cell] = cost[b_cell]
+                    self.edges.setdefault(b_cell, {})[a_cell] = cost[a_cell]
+            segment = []
+
+    def query(self, start, goal):
+        """
+        Find a path by searching the abstract graph and refining it into cells
+        :param start: (x, y)
+        :param goal: (x, y)
+        :return: path from goal back to start (start excluded) as [x, y] lists and its cost,
+                 or (None, inf) if no path was found
+        """
+        board = self.board
+        start, goal = board.open_cell(start), board.open_cell(goal)
+        if start == goal:
+            return [], 0
+
+        # temporary edges from start into its cluster and from goal's cluster into goal
+        bounds = self.cluster_bounds(start)
+        distance, link = cluster_search(board, start, bounds)
+        extra = {start: dict((cell, distance[cell]) for cell in self.clusters.get(bounds, ())
+                             if cell in distance and cell != start)}
+        if goal in distance:
+            extra[start][goal] = distance[goal]
+        bounds = self.cluster_bounds(goal)
+        distance, link = cluster_search(board, goal, bounds, reverse=True)
+        into_goal = dict((cell, distance[cell]) for cell in self.clusters.get(bounds, ())
+                         if cell in distance and cell != goal)
+
+        abstract = self._search_abstract(start, goal, extra, into_goal)
+        if abstract is None:
+            return None, float('inf')
+
+        path, total = [], 0
+        for u, v in reversed(list(zip(abstract, abstract[1:]))):
+            steps, step_cost = self._refine(u, v)
+            path.extend(steps)
+            total += step_cost
+        return path, total
+
+    def _search_abstract(self, start, goal, extra, into_goal):
+        """
+        A* over transitions with a Manhattan heuristic
+        :return: list of cells from start to goal, or None
+        """
+        width = self.board.width
+        gx, gy = divmod(goal, width)
+        g = {start: 0}
+        parent = {}
+        closed = set()
+        open_nodes = IndexedHeap()
+        open_nodes.push(start, 0)
+        while open_nodes:
+            cur = open_nodes.pop()
+            closed.add(cur)
+            if cur == goal:
+                cells = [cur]
+                while cur != start:
+                    cur = parent[cur]
+                    cells.append(cur)
+                return cells[::-1]
+            successors = dict(self.edges.get(cur, {}))
+            if cur in extra:
+                successors.update(extra[cur])
+            if cur in into_goal:
+                successors[goal] = min(into_goal[cur], successors.get(goal, float('inf')))
+            for other, edge_cost in successors.items():
+                if other in closed:
+                    continue
+                new_g = g[cur] + edge_cost
+                if new_g < g.get(other, float('inf')):
+                    x, y = divmod(other, width)
+                    f = new_g + abs(gx - x) + abs(gy - y)
+                    if other in g:
+                        open_nodes.decrease_key(other, f)
+                    else:
+                        open_nodes.push(other, f)
+                    g[other] = new_g
+                    parent[other] = cur
+        return None
+
+    def _refine(self, u, v):
+        """
+        Turn one abstract edge into cells
+        :return: cells from v back to u (u excluded) as [x, y] lists, and their cost
+        """
+        width = self.board.width
+        if self.cluster_bounds(u) != self.cluster_bounds(v):
+            return [list(divmod(v, width))], self.board.cost[v]
+        distance, link = cluster_search(self.board, u, self.cluster_bounds(u), target=v)
+        steps = []
+        cur = v
+        while cur != u:
+            steps.append(list(divmod(cur, width)))
+            cur = link[cur]
+        return steps, distance[v]
+
+    def save(self, path):
+        """
+        Write the abstraction to a JSON file, with a checksum of the board's costs
+        :param path: file name
+        :return:
+        """
+        data = {
+            "width": self.board.width,
+            "height": self.board.height,
+            "checksum": zlib.crc32(bytes(self.board.cost)),
+            "cluster_size": self.cluster_size,
+            "entrance_width": self.entrance_width,
+            "edges": [[u, v, c] for u, targets in self.edges.items() for v, c in targets.items()],
+        }
+        with open(path, "w") as file:
+            json.dump(data, file)
+
+    @classmethod
+    def load(cls, path, board):
+        """
+        Read an abstraction written by save()
+        :param path: file name
+        :param board: the CompactBoard it was built for
+        :return: Abstraction
+        """
+        with open(path, "r") as file:
+            data = json.load(file)
+        if (data["width"], data["height"], data["checksum"]) != \
+                (board.width, board.height, zlib.crc32(bytes(board.cost))):
+            raise ValueError("%s was built for a different board" % path)
+        abstraction = cls(board, data["cluster_size"], data["entrance_width"], build=False)
+        for u, v, c in data["edges"]:
+            abstraction.edges.setdefault(u, {})[v] = c
+        abstraction._index_clusters()
+        return abstraction
@@ -0,0 +1,156 @@
+"""
+Incremental replanning with D* Lite on a CompactBoard.
+
+The planner searches backwards from the goal and keeps its search tree between
+calls. When cell costs change (a cell becomes a wall, water floods a field) only
+the cells whose cost-to-goal is affected are recomputed, so replanning after a few
+edits is much cheaper than a new search. The start can also move along the path.
+"""
+from array import array
+
+from a_star import COSTS, IndexedHeap
+
+INF = float('inf')
+
+
+class DStarLite:
+    """
+    D* Lite planner for one goal. Costs are copied from the board on creation and
+    changed with update_costs(); the board itself is not modified.
+    Moving into a cell costs that cell's cost, and a cost of 0 is a wall.
+    """
+    def __init__(self, board, start, goal):
+        """
+        :param board: CompactBoard
+        :param start: (x, y)
+        :param goal: (x, y)
+        """
+        self.width, self.height = board.width, board.height
+        self.cost = bytearray(board.cost)
+        self.start = board.open_cell(start)
+        self.goal = board.open_cell(goal)
+        size = self.width * self.height
+        self.g = array('d', [INF]) * size       # cost to goal per cell
+        self.rhs = array('d', [INF]) * size     # one-step lookahead of g
+        self.rhs[self.goal] = 0
+        self.km = 0                 # key modifier, grows as the start moves
+        self.last = self.start
+        self.open_nodes = IndexedHeap()
+        self.open_nodes.push(self.goal, self._key(self.goal))
+        self.expansions = 0         # expansions made by the last plan()
+
+    def _neighbours(self, cell):
+        x, y = divmod(cell, self.width)
+        return [n for n in (cell - self.width if x > 0 else -1,
+                            cell - 1 if y > 0 else -1,
+                            cell + 1 if y < self.width - 1 else -1,
+                            cell + self.width if x < self.height - 1 else -1) if n != -1]
+
+    def _h(self, cell):
+        x, y = divmod(cell, self.width)
+        sx, sy = divmod(self.start, self.width)
+        return abs(sx - x) + abs(sy - y)
+
+    def _key(self, cell):
+        best = min(self.g[cell], self.rhs[cell])
+        return (best + self._h(cell) + self.km, best)
+
+    def _edge(self, cell, other):
+        """
+        Cost of moving from cell into other
+        """
+        if not self.cost[cell] or not self.cost[other]:
+            return INF
+        return self.cost[other]
+
+    def _update(self, cell):
+        g, cost = self.g, self.cost
+        if cell != self.goal:
+            best = INF
+            if cost[cell]:
+                for n in self._neighbours(cell):
+                    if cost[n] and cost[n] + g[n] < best:
+                        best = cost[n] + g[n]
+            self.rhs[cell] = best
+        consistent = g[cell] == self.rhs[cell]
+        if cell in self.open_nodes:
+            if consistent:
+                self.open_nodes.remove(cell)
+            else:
+                self.open_nodes.update(cell, self._key(cell))
+        elif not consistent:
+            self.open_nodes.push(cell, self._key(cell))
+
+    def plan(self):
+        """
+        Bring the search tree up to date and read off the path
+        :return: path from goal back to start (start excluded) as [x, y] lists and its cost,
+                 or (None, inf) if the goal cannot be reached
+        """
+        g, rhs, open_nodes = self.g, self.rhs, self.open_nodes
+        self.expansions = 0
+        while open_nodes and (open_nodes.top_priority() < self._key(self.start) or
+                              rhs[self.start] != g[self.start]):
+            cell = open_nodes.top()
+            old_key, new_key = open_nodes.top_priority(), self._key(cell)
+            self.expansions += 1
+            if old_key < new_key:
+                open_nodes.update(cell, new_key)
+            elif g[cell] > rhs[cell]:
+                g[cell] = rhs[cell]
+                open_nodes.pop()
+                for n in self._neighbours(cell):
+                    self._update(n)
+            else:
+                g[cell] = INF
+                self._update(cell)
+                for n in self._neighbours(cell):
+                    self._update(n)
+        return self._path()
+
+    def _path(self):
+        total = self.g[self.start]
+        if total == INF:
+            return None, INF
+        path = []
+        cell = self.start
+        while cell != self.goal:
+            cell = min(self._neighbours(cell),
+                       key=lambda n: self._edge(cell, n) + self.g[n])
+            path.append(list(divmod(cell, self.width)))
+        path.reverse()
+        return path, total
+
+    def update_costs(self, changes):
+        """
+        Apply cell cost changes; the next plan() repairs the search tree
+        :param changes: iterable of ((x, y), cost), where cost is a number, 0 for a wall,
+                        or a board letter such as "w" or "#"
+        :return:
+        """
+        for (x, y), cost in changes:
+            if isinstance(cost, str):
+                cost = 0 if cost == "#" else COSTS[cost]
+            cell = x * self.width + y
+            if self.cost[cell] == cost:
+                continue
+            self.cost[cell] = cost
+            # every edge into and out of the cell changed
+            self._update(cell)
+            for n in self._neighbours(cell):
+                self._update(n)
+
+    def move_start(self, start):
+        """
+        Move the start, for example after walking part of the path
+        :param start: (x, y)
+        :return:
+        """
+        x, y = start
+        if not (0 <= x < self.height and 0 <= y < self.width):
+            raise ValueError("%r is outside the board" % (start,))
+        if not self.cost[x * self.width + y]:
+            raise ValueError("%r is a wall" % (start,))
+        self.start = x * self.width + y
+        self.km += self._h(self.last)
+        self.last = self.start
@@ -0,0 +1,136 @@
+"""
+ALT (A*, landmarks, triangle inequality) heuristics for CompactBoards.
+
+A few landmark cells are chosen and the exact path costs from every cell to each
+landmark, and from each landmark to every cell, are computed once per board. By the
+triangle inequality the cost from v to goal is at least d(L, goal) - d(L, v) and at
+least d(v, L) - d(goal, L) for every landmark L. On terrain where most cells cost
+5-100 this bound is far tighter than Manhattan distance, and it stays admissible
+and consistent.
+"""
+from array import array
+import struct
+import zlib
+
+from a_star import CostField
+
+INF = float('inf')
+LANDMARKS_HEADER = struct.Struct("<4sIIII")     # magic, width, height, landmark count, cost checksum
+LANDMARKS_MAGIC = b"ALT1"
+
+
+class Landmarks:
+    """
+    Landmark distance tables for one CompactBoard. Pass landmarks.heuristic as the
+    heuristic of a_star() or PathEngine.query().
+    """
+    def __init__(self, board, count=8, build=True):
+        """
+        :param board: CompactBoard
+        :param count: number of landmarks to place
+        :param build: False to leave the tables empty (used by load())
+        """
+        self.board = board
+        self.cells = []             # landmark cell ids
+        self.to_landmark = []       # per landmark: array of costs from each cell to it
+        self.from_landmark = []     # per landmark: array of costs from it to each cell
+        if build:
+            self._build(count)
+
+    def _build(self, count):
+        """
+        Place landmarks one at a time on the open cell farthest from the ones placed
+        so far (the first one farthest from an arbitrary open cell), which puts them
+        around the edges of the map where they give the best bounds
+        """
+        cost = self.board.cost
+        first = next((i for i in range(len(cost)) if cost[i]), None)
+        if first is None:
+            return
+        nearest = CostField(self.board, self.board.coords(first), reverse=False).distance
+        for _ in range(count):
+            best, cell = -1, None
+            for i, d in enumerate(nearest):
+                if best < d < INF and i not in self.cells:
+                    best, cell = d, i
+            if cell is None:
+                break
+            self.add(cell)
+            nearest = array('d', map(min, nearest, self.from_landmark[-1]))
+
+    def add(self, cell):
+        """
+        Add a landmark and compute its distance tables
+        :param cell: linear cell id of an open cell
+        :return:
+        """
+        position = self.board.coords(cell)
+        self.cells.append(cell)
+        self.to_landmark.append(CostField(self.board, position, reverse=True).distance)
+        self.from_landmark.append(CostField(self.board, position, reverse=False).distance)
+
+    def heuristic(self, goal):
+        """
+        Build the estimate function for one goal
+        :param goal: linear cell id
+        :return: function of a cell id giving a lower bound on its cost to goal
+        """
+        width = self.board.width
+        gx, gy = divmod(goal, width)
+        tables = [(to_l, from_l, to_l[goal], from_l[goal])
+                  for to_l, from_l in zip(self.to_landmark, self.from_landmark)]
+
+        def estimate(cell):
+            x, y = divmod(cell, width)
+            best = abs(gx - x) + abs(gy - y)
+            for to_l, from_l, to_goal, from_goal in tables:
+                # d(v, goal) >= d(L, goal) - d(L, v)  and  d(v, goal) >= d(v, L) - d(goal, L)
+                from_cell, to_cell = from_l[cell], to_l[cell]
+                if from_cell < INF and from_goal - from_cell > best:
+                    best = from_goal - from_cell
+                if to_goal < INF and to_cell - to_goal > best:
+                    best = to_cell - to_goal
+            return best
+        return estimate
+
+    def save(self, path):
+        """
+        Write the landmarks and their tables to a binary file
+        :param path: file name
+        :return:
+        """
+        board = self.board
+        with open(path, "wb") as file:
+            file.write(LANDMARKS_HEADER.pack(LANDMARKS_MAGIC, board.width, board.height,
+                                             len(self.cells), zlib.crc32(bytes(board.cost))))
+            array('q', self.cells).tofile(file)
+            for to_l, from_l in zip(self.to_landmark, self.from_landmark):
+                to_l.tofile(file)
+                from_l.tofile(file)
+
+    @classmethod
+    def load(cls, path, board):
+        """
+        Read landmarks written by save()
+        :param path: file name
+        :param board: the CompactBoard they were computed for
+        :return: Landmarks
+        """
+        landmarks = cls(board, build=False)
+        size = board.width * board.height
+        with open(path, "rb") as file:
+            magic, width, height, count, checksum = LANDMARKS_HEADER.unpack(file.read(LANDMARKS_HEADER.size))
+            if magic != LANDMARKS_MAGIC:
+                raise ValueError("%s: not a landmarks file" % path)
+            if (width, height, checksum) != (board.width, board.height, zlib.crc32(bytes(board.cost))):
+                raise ValueError("%s was computed for a different board" % path)
+            cells = array('q')
+            cells.fromfile(file, count)
+            landmarks.cells = list(cells)
+            for _ in range(count):
+                to_l, from_l = array('d'), array('d')
+                to_l.fromfile(file, size)
+                from_l.fromfile(file, size)
+                landmarks.to_landmark.append(to_l)
+                landmarks.from_landmark.append(from_l)
+        return landmarks
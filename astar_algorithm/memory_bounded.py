@@ -0,0 +1,332 @@
+"""
+Memory-bounded searches for boards too large for the open and closed sets of A*.
+
+ida_star() is iterative-deepening A*: repeated depth-first searches with a growing
+f-cost threshold, holding only the current path plus a transposition table of a
+fixed number of cells. sma_star() is simplified memory-bounded A*: a best-first
+search that never holds more than node_limit nodes, forgetting the worst leaves
+when it runs out and remembering their f-costs in their parents so they can be
+regenerated later. Both return optimal paths (SMA* as long as node_limit exceeds
+the number of cells on the path) and trade time for memory: IDA* runs one
+iteration per distinct f-cost threshold, which on boards with many different
+cell costs is a lot of iterations, and SMA* regenerates forgotten nodes more and
+more often as node_limit drops below the number of nodes A* would visit. That
+cost grows steeply: on board-2-3 (a 49-cell path), node_limit=200 finds the path
+after 819 generations and node_limit=100 is still searching after 500000, so
+sma_star() takes a max_generations budget after which it gives up.
+
+    python memory_bounded.py boards/boards2/board-2-4.txt --node-limit 400
+"""
+import argparse
+import time
+import tracemalloc
+
+from a_star import Board, IndexedHeap, PathEngine, SearchStats, to_compact_board
+
+INF = float('inf')
+
+
+def _board_and_cells(board, start, goal):
+    if isinstance(board, Board):
+        board = to_compact_board(board)
+    start = board.start if start is None else board.open_cell(start)
+    goal = board.goal if goal is None else board.open_cell(goal)
+    return board, start, goal
+
+
+def _successors(board, cell):
+    cost, width = board.cost, board.width
+    x, y = divmod(cell, width)
+    return [n for n in (cell - width if x > 0 else -1,
+                        cell - 1 if y > 0 else -1,
+                        cell + 1 if y < width - 1 else -1,
+                        cell + width if x < board.height - 1 else -1) if n != -1 and cost[n]]
+
+
+def ida_star(board, start=None, goal=None, table_size=1 << 16, stats=None):
+    """
+    Iterative-deepening A* with a bounded transposition table. The table keeps the
+    cheapest cost found to up to table_size cells and prunes every costlier visit.
+    :param board: Board or CompactBoard
+    :param start: (x, y), defaults to the board's A
+    :param goal: (x, y), defaults to the board's B
+    :param table_size: most cells held in the transposition table
+    :param stats: SearchStats to fill in; peak_nodes counts path and table entries
+    :return: path from goal back to start (start excluded) as [x, y] lists and its cost,
+             or (None, inf) if there is no path
+    """
+    board, start, goal = _board_and_cells(board, start, goal)
+    if stats is None:
+        stats = SearchStats()
+    began = time.perf_counter()
+    cost, width = board.cost, board.width
+    gx, gy = divmod(goal, width)
+
+    def h(cell):
+        x, y = divmod(cell, width)
+        return abs(gx - x) + abs(gy - y)
+
+    def children(cell, g):
+        stats.expansions += 1
+        found = sorted((g + cost[n] + h(n), n) for n in _successors(board, cell))
+        stats.generated += len(found)
+        return found
+
+    table = {}              # cell -> (cheapest g seen, iteration it was seen in)
+    threshold = h(start)
+    iteration = 0
+    while threshold < INF and start != goal:
+        iteration += 1
+        next_threshold = INF
+        stack = [[start, 0, children(start, 0), 0]]     # cell, g, sorted (f, child), next index
+        on_path = {start}
+        while stack:
+            frame = stack[-1]
+            cell, g, found, i = frame
+            if i == len(found):
+                stack.pop()
+                on_path.discard(cell)
+                continue
+            frame[3] += 1
+            f, child = found[i]
+            if f > threshold:
+                next_threshold = min(next_threshold, f)
+                frame[3] = len(found)       # the rest are sorted and cost more
+                continue
+            child_g = g + cost[child]
+            if child == goal:
+                path = [list(divmod(goal, width))] + [list(divmod(c[0], width)) for c in reversed(stack[1:])]
+                stats.peak_nodes = max(stats.peak_nodes, len(stack) + len(table))
+                stats.timings["search"] = time.perf_counter() - began
+                return path, child_g
+            if child in on_path:
+                continue
+            seen = table.get(child)
+            if seen is not None and (child_g > seen[0] or child_g == seen[0] and seen[1] == iteration):
+                continue
+            if seen is not None or len(table) < table_size:
+                table[child] = (child_g, iteration)
+            on_path.add(child)
+            stack.append([child, child_g, children(child, child_g), 0])
+            if len(stack) + len(table) > stats.peak_nodes:
+                stats.peak_nodes = len(stack) + len(table)
+        threshold = next_threshold
+    stats.timings["search"] = time.perf_counter() - began
+    if start == goal:
+        return [], 0
+    return None, INF
+
+
+class _SMANode:
+    __slots__ = ("cell", "g", "f", "parent", "index", "depth", "successors", "children", "child_f")
+
+    def __init__(self, cell, g, f, parent, index, depth):
+        self.cell = cell
+        self.g = g
+        self.f = f
+        self.parent = parent
+        self.index = index          # position among the parent's successors
+        self.depth = depth
+        self.successors = None      # successor cells, filled on the first expansion
+        self.children = {}          # successor index -> _SMANode held in memory
+        self.child_f = None         # successor index -> last known f, None until generated
+
+
+def sma_star(board, start=None, goal=None, node_limit=10000, stats=None, max_generations=None):
+    """
+    Simplified memory-bounded A*: best-first search holding at most node_limit nodes
+    :param board: Board or CompactBoard
+    :param start: (x, y), defaults to the board's A
+    :param goal: (x, y), defaults to the board's B
+    :param node_limit: most nodes held at once; paths of node_limit cells or more cannot be found
+    :param stats: SearchStats to fill in; peak_nodes counts nodes held
+    :param max_generations: nodes generated before giving up, or None for no limit. Once
+                            node_limit is below the number of cells A* would visit,
+                            regenerating forgotten nodes can take millions of generations.
+    :return: path from goal back to start (start excluded) as [x, y] lists and its cost,
+             or (None, inf) if there is no path within the limits
+    """
+    board, start, goal = _board_and_cells(board, start, goal)
+    if node_limit < 2:
+        raise ValueError("node_limit must be at least 2, not %r" % (node_limit,))
+    if stats is None:
+        stats = SearchStats()
+    began = time.perf_counter()
+    cost, width = board.cost, board.width
+    gx, gy = divmod(goal, width)
+
+    def h(cell):
+        x, y = divmod(cell, width)
+        return abs(gx - x) + abs(gy - y)
+
+    root = _SMANode(start, 0, h(start), None, None, 0)
+    open_nodes = IndexedHeap()      # best first: lowest f, then deepest
+    leaves = IndexedHeap()          # nodes without children in memory, worst first: highest f, then shallowest
+    open_nodes.push(root, (root.f, 0))
+    best = {start: root}            # cell -> cheapest node held for it
+    held = 1
+    generated = 0
+
+    def backup(node):
+        # a fully generated node costs at least as much as its cheapest successor
+        while node is not None and node.child_f is not None and None not in node.child_f:
+            f = max(node.f, min(node.child_f)) if node.child_f else INF
+            if f == node.f:
+                break
+            node.f = f
+            if node in open_nodes:
+                open_nodes.update(node, (f, -node.depth))
+            if node in leaves:
+                leaves.update(node, (-f, node.depth))
+            if node.parent is not None:
+                node.parent.child_f[node.index] = f
+            node = node.parent
+
+    def forget(node):
+        # drop a leaf, remembering its f in its parent
+        nonlocal held
+        held -= 1
+        leaves.remove(node)
+        if node in open_nodes:
+            open_nodes.remove(node)
+        if best.get(node.cell) is node:
+            del best[node.cell]
+        parent = node.parent
+        del parent.children[node.index]
+        parent.child_f[node.index] = node.f
+        if not parent.children and parent is not root:
+            leaves.push(parent, (-parent.f, parent.depth))
+        if parent not in open_nodes:
+            open_nodes.push(parent, (parent.f, -parent.depth))
+        backup(parent)
+
+    while open_nodes and open_nodes.top_priority()[0] < INF:
+        node = open_nodes.top()
+        if node.cell == goal:
+            total = node.g
+            path = []
+            while node is not root:
+                path.append(list(divmod(node.cell, width)))
+                node = node.parent
+            stats.timings["search"] = time.perf_counter() - began
+            return path, total
+        if node.successors is None:
+            parent_cell = -1 if node.parent is None else node.parent.cell
+            node.successors = [n for n in _successors(board, node.cell) if n != parent_cell]
+            node.child_f = [None] * len(node.successors)
+            stats.expansions += 1
+
+        # next successor to (re)generate: new ones in order, then forgotten ones cheapest first
+        waiting = [i for i in range(len(node.successors)) if i not in node.children and
+                   (node.child_f[i] is None or node.child_f[i] < INF)]
+        if not waiting:
+            # every successor is held or hopeless: nothing left to do here until one is forgotten
+            backup(node)
+            open_nodes.remove(node)
+            if node is not root and not node.children:
+                forget(node)
+            continue
+        i = min(waiting, key=lambda k: (node.child_f[k] is not None, node.child_f[k]))
+        cell = node.successors[i]
+        g = node.g + cost[cell]
+        if max_generations is not None and generated >= max_generations:
+            break
+        generated += 1
+        stats.generated += 1
+        known = best.get(cell)
+        if known is not None and known.g <= g:
+            f = INF         # a cheaper copy is held; this one can never be better
+        elif cell != goal and node.depth + 1 >= node_limit - 1:
+            f = INF         # too deep to ever reach the goal within the limit
+        else:
+            f = max(node.f, g + h(cell))
+        node.child_f[i] = f
+        if f == INF:
+            backup(node)
+            continue
+
+        if held >= node_limit:
+            worst = leaves.top()
+            if worst is node:
+                # only the node being expanded can go; let it wait for another round
+                leaves.pop()
+                worst = leaves.top() if leaves else None
+                leaves.push(node, (-node.f, node.depth))
+            if worst is None:
+                node.child_f[i] = INF
+                backup(node)
+                continue
+            forget(worst)
+
+        child = _SMANode(cell, g, f, node, i, node.depth + 1)
+        node.children[i] = child
+        if node in leaves:
+            leaves.remove(node)
+        leaves.push(child, (-f, child.depth))
+        open_nodes.push(child, (f, -child.depth))
+        best[cell] = child
+        held += 1
+        stats.peak_nodes = max(stats.peak_nodes, held)
+        backup(node)
+    stats.timings["search"] = time.perf_counter() - began
+    return None, INF
+
+
+SEARCHES = ("astar", "ida", "sma")
+
+
+def memory_report(board, searches=SEARCHES, node_limit=10000, table_size=1 << 16, max_generations=None):
+    """
+    Run searches from A to B under tracemalloc
+    :param board: Board or CompactBoard
+    :param searches: names from SEARCHES
+    :param node_limit: node cap for SMA*
+    :param table_size: transposition table size for IDA*
+    :param max_generations: generation budget for SMA*
+    :return: list of dicts with the path cost, SearchStats counters, seconds and peak bytes allocated
+    """
+    if isinstance(board, Board):
+        board = to_compact_board(board)
+    start, goal = board.coords(board.start), board.coords(board.goal)
+    rows = []
+    for name in searches:
+        stats = SearchStats()
+        tracemalloc.start()
+        began = time.perf_counter()
+        try:
+            if name == "astar":
+                path, cost = PathEngine(board).search(start, goal, stats=stats)
+            elif name == "ida":
+                path, cost = ida_star(board, start, goal, table_size, stats)
+            elif name == "sma":
+                path, cost = sma_star(board, start, goal, node_limit, stats, max_generations)
+            else:
+                raise ValueError("search must be one of %s, not %r" % (", ".join(SEARCHES), name))
+            seconds = time.perf_counter() - began
+            peak = tracemalloc.get_traced_memory()[1]
+        finally:
+            tracemalloc.stop()
+        rows.append(dict(stats.as_dict(), search=name, cost=cost, seconds=seconds, peak_bytes=peak))
+    return rows
+
+
+def main(argv=None):
+    from a_star import make_compact_board
+    parser = argparse.ArgumentParser(description="Compare the memory use of A*, IDA* and SMA* on a board")
+    parser.add_argument("board", help="board file")
+    parser.add_argument("--searches", nargs="+", choices=SEARCHES, default=list(SEARCHES))
+    parser.add_argument("--node-limit", type=int, default=10000, help="node cap for SMA*")
+    parser.add_argument("--table-size", type=int, default=1 << 16, help="transposition table size for IDA*")
+    parser.add_argument("--max-generations", type=int, default=None,
+                        help="nodes SMA* may generate before giving up (default: no limit)")
+    args = parser.parse_args(argv)
+    board = make_compact_board(args.board)
+    for row in memory_report(board, args.searches, args.node_limit, args.table_size,
+                             args.max_generations):
+        print("%-6s cost %-8g expansions %-9d peak nodes %-8d peak %9.1f KiB  %.3f s" % (
+            row["search"], row["cost"], row["expansions"], row["peak_nodes"],
+            row["peak_bytes"] / 1024, row["seconds"]))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,126 @@
+"""
+Headless rendering of boards and paths to PNG or PPM images, without Tk.
+
+Each cell becomes a scale x scale block coloured by its cost, in the colours
+draw_task_1() and draw_task_2() use. The image is built from the cost array with
+slice assignments and bytes.translate() (one table per colour channel), so there is
+no Python loop over pixels and large boards render quickly.
+"""
+import struct
+import zlib
+
+# Cell codes above any cell cost, written over the cost array before colouring
+PATH, START, GOAL = 253, 254, 255
+UNKNOWN_COLOUR = (255, 0, 255)
+
+# Cost -> colour, for boards with one cost for every open cell ("." and "#")
+MAZE_COLOURS = {0: (190, 190, 190), 1: (255, 255, 255)}
+# Cost -> colour, for terrain boards; draw_task_2() has no walls, so they get a dark grey
+# that stands apart from the mountains (50) and the black path
+TERRAIN_COLOURS = {0: (80, 80, 80), 1: (210, 105, 30), 5: (144, 238, 144), 10: (0, 100, 0),
+                   50: (190, 190, 190), 100: (0, 0, 255)}
+MARKER_COLOURS = {PATH: (0, 0, 0), START: (255, 0, 0), GOAL: (255, 255, 0)}
+
+
+def colour_tables(colours):
+    """
+    Build one bytes.translate() table per colour channel
+    :param colours: dict of cell code -> (r, g, b)
+    :return: tuple of three 256-byte tables
+    """
+    tables = tuple(bytearray(UNKNOWN_COLOUR[c] for _ in range(256)) for c in range(3))
+    for code, rgb in list(colours.items()) + list(MARKER_COLOURS.items()):
+        for c in range(3):
+            tables[c][code] = rgb[c]
+    return tuple(bytes(table) for table in tables)
+
+
+MAZE_TABLES = colour_tables(MAZE_COLOURS)
+TERRAIN_TABLES = colour_tables(TERRAIN_COLOURS)
+
+
+def render(board, path=None, scale=8):
+    """
+    Turn a board and a path into RGB pixels
+    :param board: CompactBoard
+    :param path: cells as [x, y] lists, as returned by a_star(), or None
+    :param scale: pixels per cell side
+    :return: image width, image height, and the pixels as RGB bytes, row by row
+    """
+    width = board.width
+    cells = bytearray(board.cost)
+    for x, y in path or ():
+        cells[x * width + y] = PATH
+    if board.start is not None:
+        cells[board.start] = START
+    if board.goal is not None:
+        cells[board.goal] = GOAL
+
+    if scale > 1:
+        wide = bytearray(len(cells) * scale)
+        for k in range(scale):
+            wide[k::scale] = cells
+        stride = width * scale
+        cells = b"".join(wide[i:i + stride] * scale for i in range(0, len(wide), stride))
+
+    tables = MAZE_TABLES if board.uniform_cost is not None else TERRAIN_TABLES
+    pixels = bytearray(3 * len(cells))
+    for c in range(3):
+        pixels[c::3] = cells.translate(tables[c])
+    return width * scale, board.height * scale, pixels
+
+
+def write_ppm(file, width, height, pixels):
+    """
+    :param file: file opened in binary mode
+    :param width: image width
+    :param height: image height
+    :param pixels: RGB bytes
+    :return:
+    """
+    file.write(b"P6\n%d %d\n255\n" % (width, height))
+    file.write(pixels)
+
+
+def _png_chunk(kind, data):
+    return struct.pack(">I", len(data)) + kind + data + struct.pack(">I", zlib.crc32(kind + data))
+
+
+def write_png(file, width, height, pixels, level=6):
+    """
+    Write an 8-bit RGB PNG
+    :param file: file opened in binary mode
+    :param width: image width
+    :param height: image height
+    :param pixels: RGB bytes
+    :param level: zlib compression level
+    :return:
+    """
+    stride = 3 * width
+    view = memoryview(pixels)
+    # every row starts with filter type 0 (none)
+    raw = b"".join(b"\x00" + view[i:i + stride] for i in range(0, len(pixels), stride))
+    file.write(b"\x89PNG\r\n\x1a\n")
+    file.write(_png_chunk(b"IHDR", struct.pack(">IIBBBBB", width, height, 8, 2, 0, 0, 0)))
+    file.write(_png_chunk(b"IDAT", zlib.compress(raw, level)))
+    file.write(_png_chunk(b"IEND", b""))
+
+
+def save_image(board, image_path, path=None, scale=8):
+    """
+    Render a board and a path to a .png or .ppm file
+    :param board: CompactBoard
+    :param image_path: file name ending in .png or .ppm
+    :param path: cells as [x, y] lists, or None
+    :param scale: pixels per cell side
+    :return:
+    """
+    if image_path.endswith(".png"):
+        writer = write_png
+    elif image_path.endswith(".ppm"):
+        writer = write_ppm
+    else:
+        raise ValueError("%s: images must be .png or .ppm" % image_path)
+    width, height, pixels = render(board, path, scale)
+    with open(image_path, "wb") as file:
+        writer(file, width, height, pixels)